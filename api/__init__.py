@@ -0,0 +1,11 @@
+import logging
+
+from api.ratelimit import AdaptiveLimiter
+from api.client import NazkClient, get_client, set_client
+from api.cache import ShardedStore, get_document_cache, get_parsed_cache, get_search_cache
+from api.replay import FixtureStore
+from api.standin import NazkStandIn
+from api.singleflight import SingleFlight
+
+# records of the package go nowhere unless the application configures logging (logconfig.configure_logging)
+logging.getLogger(__name__).addHandler(logging.NullHandler())
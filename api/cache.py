@@ -0,0 +1,176 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import BinaryIO
+
+import settings
+
+log = logging.getLogger(__name__)
+
+
+# --- class ShardedStore ---
+# key -> bytes store on disk, one file per key
+# files are spread over two levels of sub-directories by key hash (ab/cd/abcd...), so a single directory
+# never holds more than a few thousand files even for millions of entries
+# writes are atomic (temp file + rename), readers never see partially written entries
+# when total size goes over max_bytes, least recently used entries are removed until size drops to 90% of the cap
+# if ttl is set, entries older than ttl seconds are treated as missing (and reads do not refresh them)
+class ShardedStore:
+
+    def __init__(self, root: str, max_bytes: int = 0, ttl: float = None):
+        self.root: str = root
+        self.max_bytes: int = max_bytes
+        self.ttl: float = ttl
+        self._size: int = None # computed on first write
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes|None:
+        f = self.open(key)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    # entry as an open binary file (to be closed by the caller), None if there is no such entry
+    # an entry replaced or evicted while the file is open stays readable until it is closed (on POSIX)
+    def open(self, key: str) -> BinaryIO|None:
+        path = self._get_path(key)
+        try:
+            if self.ttl is not None and time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        if self.ttl is None:
+            try:
+                os.utime(path) # mark as recently used for eviction
+            except OSError:
+                pass
+        return f
+
+    def put(self, key: str, data: bytes):
+        path = self._get_path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            try:
+                old_size = os.path.getsize(path)
+            except FileNotFoundError:
+                old_size = 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        if self.max_bytes:
+            with self._lock:
+                if self._size is None:
+                    self._size = self._compute_size()
+                else:
+                    self._size += len(data) - old_size
+                if self._size > self.max_bytes:
+                    self._evict(int(self.max_bytes * 0.9))
+
+    def remove(self, key: str):
+        try:
+            os.remove(self._get_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _get_path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def _iter_entries(self):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.startswith('.tmp-'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat_ = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat_
+
+    def _compute_size(self) -> int:
+        return sum(stat_.st_size for _, stat_ in self._iter_entries())
+
+    # called with self._lock held
+    def _evict(self, target_size: int):
+        entries = sorted(self._iter_entries(), key=lambda entry_: entry_[1].st_mtime)
+        size = sum(stat_.st_size for _, stat_ in entries)
+        removed = 0
+        for path, stat_ in entries:
+            if size <= target_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= stat_.st_size
+            removed += 1
+        self._size = size
+        log.info('Cache %s: %d entries evicted, size now %d bytes', self.root, removed, size)
+    # --- class ShardedStore end ---
+
+
+# -------- Tools ----------
+
+_document_cache: ShardedStore = None
+_search_cache: ShardedStore = None
+_parsed_cache: ShardedStore = None
+_cache_lock = threading.Lock()
+
+
+# cache of raw declaration documents, keyed by declaration_id
+# published documents never change, so entries don't expire - only evicted when the size cap is reached
+# returns None if caching is disabled in settings
+def get_document_cache() -> ShardedStore|None:
+    global _document_cache
+    if not settings.CACHE_ENABLED:
+        return None
+    if _document_cache is None:
+        with _cache_lock:
+            if _document_cache is None:
+                _document_cache = ShardedStore(os.path.join(settings.CACHE_DIR, 'documents'),
+                                               max_bytes=settings.DOCUMENT_CACHE_MAX_BYTES)
+    return _document_cache
+
+
+# cache of raw search (documents/list) responses, keyed by request url
+# new declarations appear in search results, so entries expire after settings.SEARCH_CACHE_TTL
+# returns None if caching is disabled in settings
+def get_search_cache() -> ShardedStore|None:
+    global _search_cache
+    if not settings.CACHE_ENABLED:
+        return None
+    if _search_cache is None:
+        with _cache_lock:
+            if _search_cache is None:
+                _search_cache = ShardedStore(os.path.join(settings.CACHE_DIR, 'search'),
+                                             max_bytes=settings.SEARCH_CACHE_MAX_BYTES,
+                                             ttl=settings.SEARCH_CACHE_TTL)
+    return _search_cache
+
+
+# cache of parsed (fully populated) Declaration objects, keyed by declaration_id + parser version
+# returns None if caching is disabled in settings
+def get_parsed_cache() -> ShardedStore|None:
+    global _parsed_cache
+    if not settings.CACHE_ENABLED:
+        return None
+    if _parsed_cache is None:
+        with _cache_lock:
+            if _parsed_cache is None:
+                _parsed_cache = ShardedStore(os.path.join(settings.CACHE_DIR, 'parsed'),
+                                             max_bytes=settings.PARSED_CACHE_MAX_BYTES)
+    return _parsed_cache
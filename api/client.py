@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import settings
+from api import jsondecode
+from api.ratelimit import AdaptiveLimiter
+from api.replay import FixtureStore
+
+log = logging.getLogger(__name__)
+
+# responses with these status codes are retried with backoff
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+# --- class NazkClient ---
+# HTTP client for public-api.nazk.gov.ua
+# keeps one requests.Session with a pool of keep-alive connections, so consecutive calls reuse
+# already established TCP/TLS connections; retries connection errors, 429 and 5xx with exponential backoff
+# every attempt waits for a slot in the adaptive limiter, which keeps concurrency as high as the API tolerates
+# if recorder is given, every successful response is saved to it as a replay fixture
+class NazkClient:
+
+    def __init__(self, pool_size: int = None, timeout: float|tuple[float, float] = None,
+                 retries: int = None, backoff: float = None, backoff_max: float = None,
+                 recorder: FixtureStore = None, limiter: AdaptiveLimiter = None):
+        self.pool_size: int = pool_size or settings.HTTP_POOL_SIZE
+        self.timeout = timeout or settings.HTTP_TIMEOUT
+        self.retries: int = settings.HTTP_RETRIES if retries is None else retries
+        self.backoff: float = settings.HTTP_BACKOFF if backoff is None else backoff
+        self.backoff_max: float = settings.HTTP_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.recorder: FixtureStore = recorder
+        self.limiter: AdaptiveLimiter = limiter or AdaptiveLimiter()
+
+        self.session = requests.Session()
+        # retries are handled in get() - adapter must not retry on its own
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, url: str) -> requests.Response:
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.limiter.release(time.monotonic() - start, throttled=isinstance(e, requests.Timeout))
+                if attempt >= self.retries:
+                    raise
+                delay = self._get_backoff(attempt)
+                log.warning('Request to %s failed (%s), retrying in %.1fs', url, e.__class__.__name__, delay)
+            except BaseException:
+                self.limiter.release(time.monotonic() - start)
+                raise
+            else:
+                retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                self.limiter.release(time.monotonic() - start, throttled=response.status_code == 429,
+                                     retry_after=min(retry_after, self.backoff_max))
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    if self.recorder is not None:
+                        self.recorder.record(url, response.content)
+                    return response
+                if attempt >= self.retries:
+                    response.raise_for_status()
+                delay = min(max(self._get_backoff(attempt), retry_after), self.backoff_max)
+                log.warning('Request to %s returned %s, retrying in %.1fs', url, response.status_code, delay)
+            time.sleep(delay)
+            attempt += 1
+
+    def get_json(self, url: str) -> dict:
+        return jsondecode.loads(self.get(url).content)
+
+    def close(self):
+        self.session.close()
+
+    def _get_backoff(self, attempt: int) -> float:
+        return min(self.backoff * (2 ** attempt), self.backoff_max)
+    # --- class NazkClient end ---
+
+
+# -------- Tools ----------
+
+_client: NazkClient = None
+_client_lock = threading.Lock()
+
+
+# returns client shared by all NAZK API calls, creates it on first call
+def get_client() -> NazkClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                recorder = FixtureStore(settings.RECORD_FIXTURES_DIR) if settings.RECORD_FIXTURES_DIR else None
+                _client = NazkClient(recorder=recorder)
+    return _client
+
+
+# replaces shared client (e.g. to apply changed settings); previous one is closed
+def set_client(client: NazkClient):
+    global _client
+    with _client_lock:
+        if _client is not None and _client is not client:
+            _client.close()
+        _client = client
+
+
+# Retry-After is either a number of seconds or an HTTP date
+def _parse_retry_after(value: str) -> float:
+    if not value:
+        return 0
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0
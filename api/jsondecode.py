@@ -0,0 +1,117 @@
+import json
+import logging
+import sys
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO
+
+import settings
+
+log = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# iter_object_items() needs ijson
+STREAMING_AVAILABLE = ijson is not None
+
+
+# stdlib parser works on str; explicit utf-8 decoding is faster than json.loads(bytes),
+# which detects the encoding first and decodes with 'surrogatepass'
+def _stdlib_loads(raw: bytes|str):
+    return json.loads(raw.decode('utf-8') if isinstance(raw, (bytes, bytearray)) else raw)
+
+
+# decoders take raw response bytes as they are; orjson parses them without building an intermediate str
+BACKENDS = {'json': _stdlib_loads}
+if orjson is not None:
+    BACKENDS['orjson'] = orjson.loads
+
+_loads = None
+
+
+# selects decoder: 'json' (stdlib), 'orjson' or 'auto' (orjson if it's installed, stdlib otherwise)
+def set_backend(name: str):
+    global _loads
+    if name == 'auto':
+        name = 'orjson' if 'orjson' in BACKENDS else 'json'
+    if name not in BACKENDS:
+        log.warning('JSON backend %s is not available, falling back to stdlib json', name)
+        name = 'json'
+    _loads = BACKENDS[name]
+    log.debug('JSON backend: %s', name)
+
+
+def get_backend() -> str:
+    if _loads is None:
+        set_backend(settings.JSON_BACKEND)
+    return next(name for name, loads_ in BACKENDS.items() if loads_ is _loads)
+
+
+# parses json document from bytes (or str) with selected backend
+# both backends raise ValueError subclasses (json.JSONDecodeError) on invalid input
+def loads(raw: bytes|str):
+    if _loads is None:
+        set_backend(settings.JSON_BACKEND)
+    return _loads(raw)
+
+
+# reads json document from a binary stream incrementally and yields (key, value) for the members of the object
+# under top-level key parent ({parent: {key: value, ...}, ...}) whose key is in keys
+# other members are only tokenized, no python objects are built for them, and each wanted value is built
+# separately - so memory holds one value at a time plus whatever the caller keeps
+# the whole stream is read (and validated) even after the last wanted member
+# buf_size - bytes read at a time; ijson builds all events of a chunk before yielding them, so a big buffer
+# costs several times its size in memory
+# raises ValueError on invalid input, like loads()
+def iter_object_items(stream: BinaryIO, parent: str, keys: Iterable[str],
+                      buf_size: int = 16 * 1024) -> Iterator[tuple[str, object]]:
+    if ijson is None:
+        raise RuntimeError('ijson is not installed, streaming json parsing is not available')
+    keys = set(keys)
+    builder = None
+    key_ = None
+    depth = 0 # nesting level in the document, 1 - inside the top-level object
+    value_depth = 0 # nesting level inside the value being built
+    at_parent = False # the next value is the one under parent key
+    in_parent = False
+    try:
+        # basic_parse does not build a path string for every event, unlike ijson.parse
+        for event_, value_ in ijson.basic_parse(stream, buf_size=buf_size, use_float=True):
+            if builder is not None:
+                if event_ == 'map_key':
+                    value_ = sys.intern(value_) # the same few keys repeat in every entry
+                elif event_ == 'start_map' or event_ == 'start_array':
+                    value_depth += 1
+                elif event_ == 'end_map' or event_ == 'end_array':
+                    value_depth -= 1
+                builder.event(event_, value_)
+                if value_depth == 0:
+                    yield key_, builder.value
+                    builder = None
+                continue
+            if event_ == 'map_key':
+                if depth == 1:
+                    at_parent = value_ == parent
+                elif in_parent and depth == 2 and value_ in keys:
+                    key_ = value_
+                    builder = ijson.ObjectBuilder()
+            elif event_ == 'start_map' or event_ == 'start_array':
+                depth += 1
+                if at_parent:
+                    in_parent = depth == 2 and event_ == 'start_map'
+                    at_parent = False
+            elif event_ == 'end_map' or event_ == 'end_array':
+                depth -= 1
+                if depth < 2:
+                    in_parent = False
+            else:
+                at_parent = False
+    except ijson.JSONError as e:
+        raise ValueError(f'Invalid json: {e}') from e
@@ -0,0 +1,75 @@
+import logging
+import threading
+import time
+
+import settings
+
+log = logging.getLogger(__name__)
+
+
+# --- class AdaptiveLimiter ---
+# limits the number of concurrent requests to the API and adjusts that limit AIMD-style:
+#  - every successful response raises the limit by 1/limit (i.e. by ~1 per "round" of requests)
+#  - a throttled response (429) or a response much slower than usual cuts the limit by decrease factor
+#    (at most once per cooldown, so a burst of 429s from one overload counts as a single event)
+#  - Retry-After from a throttled response pauses all new requests until it passes
+# one instance is shared by every thread using the same NazkClient
+class AdaptiveLimiter:
+
+    def __init__(self, initial: float = None, min_limit: float = None, max_limit: float = None,
+                 decrease: float = None, latency_factor: float = None, cooldown: float = 1.0):
+        self.min_limit: float = min_limit or settings.RATE_LIMIT_MIN
+        self.max_limit: float = max_limit or settings.RATE_LIMIT_MAX
+        self.limit: float = min(max(initial or settings.RATE_LIMIT_INITIAL, self.min_limit), self.max_limit)
+        self.decrease: float = decrease or settings.RATE_LIMIT_DECREASE
+        # response slower than latency_factor * typical latency is treated as a sign of overload
+        self.latency_factor: float = latency_factor or settings.RATE_LATENCY_FACTOR
+        self.cooldown: float = cooldown
+        self.in_flight: int = 0
+        self.throttled_count: int = 0
+        self._typical_latency: float = None # smoothed latency of fast responses
+        self._paused_until: float = 0.0
+        self._last_decrease: float = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                elif self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                else:
+                    self.in_flight += 1
+                    return
+
+    # latency - seconds the request took; throttled - server asked to slow down (429)
+    # retry_after - seconds to hold all new requests, as sent by the server
+    def release(self, latency: float, throttled: bool = False, retry_after: float = 0.0):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self.throttled_count += 1
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+                self._decrease(now, 'throttled')
+            else:
+                if self._typical_latency is not None and latency > self._typical_latency * self.latency_factor:
+                    self._decrease(now, f'slow response ({latency:.2f}s)')
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                # keeps adapting, so a network that is slower overall does not hold the limit at minimum
+                self._typical_latency = (latency if self._typical_latency is None
+                                         else 0.9 * self._typical_latency + 0.1 * latency)
+            self._cond.notify_all()
+
+    # called with self._cond held
+    def _decrease(self, now: float, reason: str):
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        log.info('Request limit lowered to %.1f: %s', self.limit, reason)
+    # --- class AdaptiveLimiter end ---
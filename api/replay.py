@@ -0,0 +1,103 @@
+import logging
+import os
+import tempfile
+from collections.abc import Iterator
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+log = logging.getLogger(__name__)
+
+LIST_ROUTE = '/v2/documents/list'
+
+DOC_ROUTE = '/v2/documents/'
+
+
+# --- class FixtureStore ---
+# directory with recorded NAZK API responses, stored exactly as they were received:
+#   <root>/list/<quoted query>.<page>.json  - documents/list pages
+#   <root>/documents/<quoted id>.json      - full declaration documents
+# filled by NazkClient when settings.RECORD_FIXTURES_DIR is set, served back by api.standin.NazkStandIn
+class FixtureStore:
+
+    def __init__(self, root: str):
+        self.root: str = root
+
+    # saves response body under the route it was requested from; urls not matching API routes are ignored
+    def record(self, url: str, body: bytes):
+        route = parse_route(url)
+        if route is None:
+            log.debug('Not recording response from %s - unknown route', url)
+            return
+        kind, key, page = route
+        if kind == 'list':
+            self.save_list(key, page, body)
+        else:
+            self.save_document(key, body)
+
+    def save_list(self, query: str, page: int, body: bytes):
+        self._write(self._get_list_path(query, page), body)
+
+    def load_list(self, query: str, page: int) -> bytes|None:
+        return self._read(self._get_list_path(query, page))
+
+    def save_document(self, declaration_id: str, body: bytes):
+        self._write(self._get_document_path(declaration_id), body)
+
+    def load_document(self, declaration_id: str) -> bytes|None:
+        return self._read(self._get_document_path(declaration_id))
+
+    # returns every recorded search query (as it was sent, i.e. unified name with spaces instead of '+')
+    def iter_queries(self) -> Iterator[str]:
+        list_dir = os.path.join(self.root, 'list')
+        if not os.path.isdir(list_dir):
+            return
+        for name in sorted(os.listdir(list_dir)):
+            query, page, ext = name.rsplit('.', 2)
+            if page == '1' and ext == 'json':
+                yield unquote(query)
+
+    def count_documents(self) -> int:
+        documents_dir = os.path.join(self.root, 'documents')
+        return len(os.listdir(documents_dir)) if os.path.isdir(documents_dir) else 0
+
+    def _get_list_path(self, query: str, page: int) -> str:
+        return os.path.join(self.root, 'list', f'{quote(query, safe="")}.{page}.json')
+
+    def _get_document_path(self, declaration_id: str) -> str:
+        return os.path.join(self.root, 'documents', f'{quote(declaration_id, safe="")}.json')
+
+    @staticmethod
+    def _read(path: str) -> bytes|None:
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write(path: str, body: bytes):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+    # --- class FixtureStore end ---
+
+
+# -------- Tools ----------
+
+# splits API url (or request path) into ('list', query, page) or ('document', declaration_id, None)
+# returns None for anything else
+# query is decoded the same way for recorded urls and for requests coming to the stand-in,
+# so both sides agree on fixture names ('+' in the unified name becomes a space)
+def parse_route(url: str) -> tuple[str, str, int|None]|None:
+    parts = urlsplit(url)
+    path = unquote(parts.path)
+    if path.rstrip('/') == LIST_ROUTE:
+        params = parse_qs(parts.query)
+        query = params.get('query', [''])[0]
+        page = params.get('page', ['1'])[0]
+        return 'list', query, int(page) if page.isdigit() else 1
+    if path.startswith(DOC_ROUTE) and len(path) > len(DOC_ROUTE):
+        return 'document', path[len(DOC_ROUTE):].strip('/'), None
+    return None
@@ -0,0 +1,47 @@
+import threading
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException = None
+
+
+# --- class SingleFlight ---
+# coalesces concurrent calls with the same key: the first caller runs fn, the others wait for it
+# and get the same result (or the same exception); once the call finishes the key is forgotten,
+# so later calls run fn again (results are not cached here)
+class SingleFlight:
+
+    def __init__(self):
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+    # --- class SingleFlight end ---
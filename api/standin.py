@@ -0,0 +1,134 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api.replay import FixtureStore, parse_route
+
+
+# --- class NazkStandIn ---
+# local HTTP server that mimics /v2/documents/list and /v2/documents/{id} of public-api.nazk.gov.ua,
+# serving responses recorded in a FixtureStore
+# latency (+ random jitter) is added to every response; error_rate is the share of requests answered with
+# error_status instead (429 responses carry Retry-After: retry_after)
+# usage:
+#   stand_in = NazkStandIn(FixtureStore('fixtures'), latency=0.05).start()
+#   settings.API_BASE_URL = stand_in.base_url
+class NazkStandIn:
+
+    def __init__(self, store: FixtureStore, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503, retry_after: int = 1, seed: int = None):
+        self.store: FixtureStore = store
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.error_rate: float = error_rate
+        self.error_status: int = error_status
+        self.retry_after: int = retry_after
+        self.requests_served: int = 0
+        self.errors_injected: int = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread: threading.Thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='nazk-stand-in', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # returns (status, headers, body) for request path
+    def respond(self, path: str) -> tuple[int, dict[str, str], bytes]:
+        with self._lock:
+            self.requests_served += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            inject_error = self.error_rate and self._random.random() < self.error_rate
+            if inject_error:
+                self.errors_injected += 1
+        if delay:
+            time.sleep(delay)
+        if inject_error:
+            headers = {'Retry-After': str(self.retry_after)} if self.error_status == 429 else {}
+            return self.error_status, headers, _error_body(self.error_status, 'injected error')
+
+        route = parse_route(path)
+        body = None
+        if route is not None:
+            kind, key, page = route
+            body = self.store.load_list(key, page) if kind == 'list' else self.store.load_document(key)
+            if body is None and kind == 'list':
+                # page past the recorded ones - empty page, like the API does
+                body = json.dumps({'count': 0, 'data': []}).encode('utf-8')
+        if body is None:
+            return 404, {}, _error_body(404, 'not found')
+        return 200, {}, body
+    # --- class NazkStandIn end ---
+
+
+# -------- Tools ----------
+
+def _error_body(status: int, message: str) -> bytes:
+    return json.dumps({'error': status, 'message': message}).encode('utf-8')
+
+
+def _make_handler(stand_in: NazkStandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1' # keep-alive, like the real API
+
+        def do_GET(self):
+            status, headers, body = stand_in.respond(self.path)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass # keep benchmark output clean
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve recorded NAZK API fixtures on a local port')
+    parser.add_argument('fixtures', help='fixture directory (see settings.RECORD_FIXTURES_DIR)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='max random seconds added on top of latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with an error')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    stand_in = NazkStandIn(FixtureStore(args.fixtures), host=args.host, port=args.port,
+                           latency=args.latency, jitter=args.jitter,
+                           error_rate=args.error_rate, error_status=args.error_status, seed=args.seed)
+    print(f'Serving {args.fixtures} at {stand_in.base_url} (set NAZK_API_BASE_URL to use it)')
+    try:
+        stand_in.start()._thread.join()
+    except KeyboardInterrupt:
+        stand_in.stop()
+
+
+if __name__ == '__main__':
+    main()
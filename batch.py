@@ -0,0 +1,358 @@
+# Batch run of check_person over a list of names, spread over a pool of worker processes.
+# Names come from a text file, one per line: full name, optionally followed by a tab (or ';') and declarant_id;
+# empty lines and lines starting with '#' are skipped.
+# Every finished attempt is appended to a journal (settings.BATCH_JOURNAL, json lines) and flushed to disk,
+# so a run that was stopped can be started again with the same journal - names already done are skipped,
+# failed ones are tried again. Within a run a failed name is retried after an increasing delay.
+# usage (from repository root):
+#   python batch.py names.txt --workers 4 --journal batch_journal.jsonl
+import argparse
+import heapq
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime
+
+import settings
+from logconfig import configure_logging
+
+log = logging.getLogger(__name__)
+# nothing is printed unless the program configures logging (logconfig.configure_logging)
+log.addHandler(logging.NullHandler())
+
+# statuses in the journal
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+# will not succeed on retry (e.g. namesakes - needs declarant_id), tried again only in the next run
+STATUS_SKIPPED = 'skipped'
+
+
+@dataclass(frozen=True)
+class BatchTask:
+    full_name: str
+    declarant_id: int = 0
+
+    @property
+    def key(self) -> str:
+        return f'{self.full_name}#{self.declarant_id}' if self.declarant_id else self.full_name
+
+
+# reads tasks from a names file, in file order, without duplicates
+def read_names(path: str) -> list[BatchTask]:
+    tasks: dict[str, BatchTask] = {}
+    with open(path, encoding='utf-8-sig') as f:
+        for line_number_, line_ in enumerate(f, start=1):
+            line_ = line_.strip()
+            if not line_ or line_.startswith('#'):
+                continue
+            parts = [part_.strip() for part_ in line_.replace(';', '\t').split('\t')]
+            if len(parts) > 2 or (len(parts) == 2 and parts[1] and not parts[1].isdecimal()):
+                raise ValueError(f'{path}:{line_number_}: expected "full name[<tab>declarant_id]", got: {line_}')
+            task = BatchTask(parts[0], int(parts[1]) if len(parts) == 2 and parts[1] else 0)
+            tasks.setdefault(task.key, task)
+    return list(tasks.values())
+
+
+# --- class BatchJournal ---
+# append-only json lines file, one line per finished attempt:
+# {"key", "full_name", "declarant_id", "status", "attempt", "documents", "seconds", "error", "time"}
+# each line is flushed and fsync'ed before the next task is scheduled; a truncated last line (process killed
+# while writing) is ignored when the journal is read again
+class BatchJournal:
+
+    def __init__(self, path: str):
+        self.path: str = path
+        # key -> last journal entry of the name
+        self.last_entries: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line_ in f:
+                    try:
+                        entry_ = json.loads(line_)
+                    except ValueError:
+                        log.warning('Broken line in batch journal %s ignored: %s', path, line_.strip())
+                        continue
+                    self.last_entries[entry_['key']] = entry_
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def is_done(self, task: BatchTask) -> bool:
+        entry_ = self.last_entries.get(task.key)
+        return entry_ is not None and entry_['status'] == STATUS_DONE
+
+    # attempts made for the name in all runs so far
+    def get_attempts(self, task: BatchTask) -> int:
+        entry_ = self.last_entries.get(task.key)
+        return entry_['attempt'] if entry_ is not None else 0
+
+    def record(self, task: BatchTask, status: str, attempt: int, documents: int = 0, seconds: float = 0.0,
+               error: str = None):
+        entry_ = {'key': task.key, 'full_name': task.full_name, 'declarant_id': task.declarant_id,
+                  'status': status, 'attempt': attempt, 'documents': documents, 'seconds': round(seconds, 3),
+                  'error': error, 'time': datetime.now().isoformat(timespec='seconds')}
+        self._file.write(json.dumps(entry_, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.last_entries[task.key] = entry_
+
+    def close(self):
+        self._file.close()
+    # --- class BatchJournal end ---
+
+
+# ------ Worker process ------
+
+# queue the worker tells the parent through which task it has started (see run_batch)
+_started_queue = None
+
+
+# runs once in every worker process: applies settings of the parent process (workers are spawned,
+# so they start from module defaults) and warms the worker up; HTTP client and caches are created
+# by each worker on first use
+def init_worker(settings_values: dict, started_queue=None, write_docx: bool = True):
+    global _started_queue
+    _started_queue = started_queue
+    for name_, value_ in settings_values.items():
+        setattr(settings, name_, value_)
+    configure_logging()
+    warm_up_worker(write_docx)
+
+
+# loads what every task needs once per worker instead of once per task: nazkTools with requests, parser
+# version hash (hashes the source of all parsers) and exchange rates; with write_docx also python-docx and
+# the parsed report template (each report starts from a copy of it)
+# a missing or unreadable template is only logged - the worker must start anyway, reports then fail one by one
+def warm_up_worker(write_docx: bool = True):
+    import nazkTools
+    from entities.rates import get_exchange_rates
+    start = time.perf_counter()
+    nazkTools.get_parser_version()
+    get_exchange_rates()
+    if write_docx:
+        from docx.opc.exceptions import PackageNotFoundError
+        from reports.general_report import get_template_document
+        try:
+            get_template_document()
+        except (OSError, PackageNotFoundError) as e:
+            log.warning('Report template %s could not be loaded, docx reports will fail (%s)',
+                        settings.REPORT_TEMPLATE, e)
+    log.info('Worker %d warmed up in %.2fs', os.getpid(), time.perf_counter() - start)
+
+
+# checks one name in a worker process and writes its docx report
+# returns (status, number of loaded declarations, seconds, error message)
+def check_name(task: BatchTask, write_docx: bool = True) -> tuple[str, int, float, str|None]:
+    import nazkTools
+    if _started_queue is not None:
+        _started_queue.put(task.key)
+    start = time.perf_counter()
+    try:
+        context = nazkTools.analyze_person(task.full_name, task.declarant_id)
+        if write_docx:
+            context.report.print_to_docx()
+    except Exception as e:
+        return STATUS_FAILED, 0, time.perf_counter() - start, f'{e.__class__.__name__}: {e}'
+    except BaseException as e:
+        if type(e) is not BaseException: # KeyboardInterrupt, SystemExit
+            raise
+        # check_person raises bare BaseException when it finds namesakes
+        return STATUS_SKIPPED, 0, time.perf_counter() - start, 'namesakes found, declarant_id is needed'
+    return STATUS_DONE, len(context.timeline), time.perf_counter() - start, None
+
+
+# ------ Runner ------
+
+def _get_settings_values() -> dict:
+    return {name_: value_ for name_, value_ in vars(settings).items() if name_.isupper()}
+
+
+# --- class Throughput ---
+class Throughput:
+
+    def __init__(self, total: int):
+        self.total: int = total
+        self.done: int = 0
+        self.failed: int = 0
+        self.documents: int = 0
+        self._start: float = time.perf_counter()
+        self._last_print: float = self._start
+
+    def add(self, status: str, documents: int):
+        if status == STATUS_DONE:
+            self.done += 1
+            self.documents += documents
+        else:
+            self.failed += 1
+
+    def __str__(self):
+        minutes = max(time.perf_counter() - self._start, 1e-9) / 60
+        return (f'{self.done}/{self.total} names done, {self.failed} failed attempts, '
+                f'{self.done / minutes:.1f} names/min, {self.documents / minutes:.1f} documents/min')
+
+    def print_if_due(self, interval: float):
+        now = time.perf_counter()
+        if now - self._last_print >= interval:
+            self._last_print = now
+            print(self, flush=True)
+    # --- class Throughput end ---
+
+
+# worker processes are spawned, not forked - they must not share HTTP connections or locks with the parent
+# started_queue - multiprocessing SimpleQueue of the same context, workers put keys of the tasks they start to it
+def _new_executor(workers: int, started_queue=None, write_docx: bool = True) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=init_worker,
+                               initargs=(_get_settings_values(), started_queue, write_docx),
+                               max_tasks_per_child=settings.BATCH_TASKS_PER_WORKER)
+
+
+# keys the workers put to the queue so far, only those of the given (running) tasks - a start message
+# may come after the result of its task
+def _drain_started(queue, running: dict) -> set[str]:
+    keys = set()
+    while not queue.empty():
+        keys.add(queue.get())
+    return keys & {task_.key for _, task_, _ in running.values()}
+
+
+# runs check_person for every task not done in the journal yet; returns tasks that are still not done
+# workers, attempts, backoff - settings.BATCH_WORKERS, BATCH_ATTEMPTS, BATCH_RETRY_BACKOFF by default
+# when a worker process dies the whole pool breaks and every task in it fails; an attempt is charged only to
+# the task that was running in it:
+#  - tasks that had not started yet are submitted again to a new pool, uncharged
+#  - if only one started task was lost, it is the one that killed the worker - it gets a failed attempt
+#  - if several were, none is charged; they become suspects and run one at a time until each finishes
+#    or breaks the pool alone
+# raises RuntimeError if the pool breaks settings.BATCH_MAX_POOL_FAILURES times in a row before any task starts
+def run_batch(tasks: list[BatchTask], journal_path: str = None, workers: int = None, attempts: int = None,
+              backoff: float = None, write_docx: bool = True) -> list[BatchTask]:
+    journal = BatchJournal(journal_path or settings.BATCH_JOURNAL)
+    workers = workers or settings.BATCH_WORKERS
+    attempts = attempts or settings.BATCH_ATTEMPTS
+    backoff = settings.BATCH_RETRY_BACKOFF if backoff is None else backoff
+    todo = [task_ for task_ in tasks if not journal.is_done(task_)]
+    print(f'{len(tasks)} names, {len(tasks) - len(todo)} already done, {len(todo)} to check '
+          f'with {workers} workers', flush=True)
+    throughput = Throughput(len(todo))
+    # (time the task may start, order, task, attempts made in this run)
+    ready: list[tuple[float, int, BatchTask, int]] = [(0.0, i_, task_, 0) for i_, task_ in enumerate(todo)]
+    heapq.heapify(ready)
+    not_done: list[BatchTask] = []
+    running = {}
+    # keys of tasks started by workers of the current pool and not finished yet
+    started: set[str] = set()
+    suspects: set[str] = set()
+    pool_failures = 0
+    context = multiprocessing.get_context('spawn')
+    started_queue = context.SimpleQueue()
+    executor = _new_executor(workers, started_queue, write_docx)
+
+    def finish_attempt(order_, task_, tries_, status, documents, seconds, error):
+        journal.record(task_, status, journal.get_attempts(task_) + 1, documents, seconds, error)
+        throughput.add(status, documents)
+        if status == STATUS_FAILED and tries_ < attempts:
+            delay = backoff * 2 ** (tries_ - 1)
+            log.warning('%s: attempt %d failed (%s), retry in %.0fs', task_.full_name, tries_, error, delay)
+            heapq.heappush(ready, (time.monotonic() + delay, order_, task_, tries_))
+        elif status != STATUS_DONE:
+            log.error('%s: %s after %d attempts (%s)', task_.full_name, status, tries_, error)
+            not_done.append(task_)
+
+    try:
+        while ready or running:
+            now = time.monotonic()
+            while ready and ready[0][0] <= now and len(running) < workers * 2:
+                # a suspect runs alone
+                if running and (ready[0][2].key in suspects
+                                or any(task_.key in suspects for _, task_, _ in running.values())):
+                    break
+                _, order_, task_, tries_ = heapq.heappop(ready)
+                running[executor.submit(check_name, task_, write_docx)] = (order_, task_, tries_ + 1)
+            timeout = max(ready[0][0] - now, 0.0) if ready else None
+            if running:
+                timeout = min(timeout, settings.BATCH_PROGRESS_INTERVAL) if timeout is not None \
+                    else settings.BATCH_PROGRESS_INTERVAL
+                finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(timeout)
+                finished = ()
+            broken_error = None
+            for future_ in finished:
+                try:
+                    result = future_.result()
+                except BrokenProcessPool as e: # a worker process died - every task in the pool fails
+                    broken_error = f'{e.__class__.__name__}: {e}'
+                    continue
+                order_, task_, tries_ = running.pop(future_)
+                started.discard(task_.key)
+                suspects.discard(task_.key)
+                pool_failures = 0
+                finish_attempt(order_, task_, tries_, *result)
+            if broken_error is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+                started |= _drain_started(started_queue, running)
+                lost = list(running.values())
+                running.clear()
+                crashed = [entry_ for entry_ in lost if entry_[1].key in started]
+                if crashed:
+                    pool_failures = 0
+                else:
+                    pool_failures += 1
+                    if pool_failures >= settings.BATCH_MAX_POOL_FAILURES:
+                        raise RuntimeError(f'Worker pool broke {pool_failures} times in a row before any name '
+                                           f'reached a worker - worker processes fail to start ({broken_error})')
+                if len(crashed) == 1:
+                    order_, task_, tries_ = crashed[0]
+                    log.error('Worker process died while checking %s, starting a new pool', task_.full_name)
+                    suspects.add(task_.key)
+                    finish_attempt(order_, task_, tries_, STATUS_FAILED, 0, 0.0, broken_error)
+                else:
+                    log.error('Worker process died, starting a new pool (%d names lost, none charged)', len(lost))
+                    suspects.update(entry_[1].key for entry_ in crashed)
+                for order_, task_, tries_ in lost:
+                    if len(crashed) != 1 or task_.key != crashed[0][1].key:
+                        heapq.heappush(ready, (time.monotonic(), order_, task_, tries_ - 1))
+                started.clear()
+                started_queue = context.SimpleQueue()
+                executor = _new_executor(workers, started_queue, write_docx)
+            else:
+                started |= _drain_started(started_queue, running)
+            throughput.print_if_due(settings.BATCH_PROGRESS_INTERVAL)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        journal.close()
+    print(throughput, flush=True)
+    return not_done
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Check declarations of every person from a names file')
+    parser.add_argument('names', help='file with one full name per line, optionally <tab>declarant_id')
+    parser.add_argument('--journal', default=settings.BATCH_JOURNAL, help='checkpoint journal (json lines)')
+    parser.add_argument('--workers', type=int, default=settings.BATCH_WORKERS, help='worker processes')
+    parser.add_argument('--attempts', type=int, default=settings.BATCH_ATTEMPTS,
+                        help='attempts per name in this run')
+    parser.add_argument('--backoff', type=float, default=settings.BATCH_RETRY_BACKOFF,
+                        help='delay before the second attempt, seconds; doubled for every next one')
+    parser.add_argument('--no-docx', action='store_true', help='do not write docx reports')
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    try:
+        not_done = run_batch(read_names(args.names), args.journal, args.workers, args.attempts, args.backoff,
+                             write_docx=not args.no_docx)
+    except RuntimeError as e:
+        print(f'Batch stopped: {e}', file=sys.stderr)
+        return 2
+    if not_done:
+        print(f'Not processed: {[task_.key for task_ in not_done]}')
+    return 1 if not_done else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
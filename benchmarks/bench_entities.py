@@ -0,0 +1,144 @@
+# Memory and construction time of parsed entities (Person, Property, Vehicle, EarningsEntry, SavingsEntry)
+# for a synthetic corpus - slotted dataclasses with interned strings vs the plain classes they replaced.
+# Step data of a few hundred distinct documents is decoded and parsed over and over, every entity is kept
+# until the end, as a corpus run keeps them in its declarations.
+# usage (from repository root):
+#   python -m benchmarks.bench_entities --declarations 100000
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import entities.earnings
+import entities.person
+import entities.property
+import entities.savings
+import entities.vehicle
+from benchmarks import synthetic
+from entities.vehicle import _get_year
+
+
+# ------ Classes as they were before (per-instance __dict__, no interning) ------
+
+class _PlainPerson:
+    def __init__(self, person_id, full_name, relation_type, mentions):
+        self.person_id = int(person_id)
+        self.full_name = full_name
+        self.relation_type = relation_type
+        self.mentions = mentions
+
+
+class _PlainProperty:
+    def __init__(self, place, property_type, acquire_date, total_area, ownership_type, owners, cost):
+        self.place = place
+        self.property_type = property_type.lower()
+        self.acquire_date = acquire_date
+        self.total_area = float(total_area)
+        self.ownership_type = ownership_type
+        self.owners = owners
+        self.cost = cost
+
+
+class _PlainVehicle:
+    def __init__(self, vehicle_type, brand, model, manufacture_year, acquire_date, owners, cost):
+        self.vehicle_type = vehicle_type.lower()
+        self.brand = brand
+        self.model = model
+        self.manufacture_year = _get_year(manufacture_year)
+        self.acquire_date = acquire_date
+        self.owners = owners
+        self.cost = cost
+
+
+class _PlainEarningsEntry:
+    def __init__(self, amount, owner, origin):
+        self.amount = float(amount)
+        self.owner = owner
+        self.origin = origin
+        self.amount_taxed = round(self.amount * 0.8, 2) if 'заробітна плата' in str(origin).lower() else self.amount
+
+
+class _PlainSavingsEntry:
+    def __init__(self, amount, currency, owner, type_):
+        self.amount = amount
+        self.currency = currency
+        self.owner = str(owner)
+        self.type_ = type_
+
+
+_PLAIN = {entities.person: {'Person': _PlainPerson},
+          entities.property: {'Property': _PlainProperty},
+          entities.vehicle: {'Vehicle': _PlainVehicle},
+          entities.earnings: {'EarningsEntry': _PlainEarningsEntry},
+          entities.savings: {'SavingsEntry': _PlainSavingsEntry}}
+
+
+# swaps entity classes in parser modules for the plain ones and turns interning off
+@contextmanager
+def _plain_entities():
+    saved = []
+    for module_, names in _PLAIN.items():
+        for name_, value_ in list(names.items()) + [('intern_value', lambda value: value)]:
+            saved.append((module_, name_, getattr(module_, name_)))
+            setattr(module_, name_, value_)
+    try:
+        yield
+    finally:
+        for module_, name_, value_ in saved:
+            setattr(module_, name_, value_)
+
+
+_PARSERS = (('step_2', entities.person.get_person_entries), ('step_3', entities.property.get_property_entries),
+            ('step_6', entities.vehicle.get_vehicle_entries), ('step_11', entities.earnings.get_earnings_entries),
+            ('step_12', entities.savings.get_savings_entries))
+
+
+# documents are decoded for every declaration, as responses are - so equal strings are separate objects
+# unless the parsers intern them; only parsing is timed
+def _parse_corpus(documents: list[str], n_declarations: int) -> tuple[list, float]:
+    parsed = []
+    seconds = 0.0
+    for i_ in range(n_declarations):
+        document = json.loads(documents[i_ % len(documents)])
+        start = time.perf_counter()
+        parsed.append([parse_(document[key_]['data']) for key_, parse_ in _PARSERS if 'data' in document[key_]])
+        seconds += time.perf_counter() - start
+    return parsed, seconds
+
+
+# returns (seconds, bytes held by the parsed entities, number of entities)
+def _measure(documents: list[str], n_declarations: int) -> tuple[float, int, int]:
+    gc.collect()
+    parsed, seconds = _parse_corpus(documents, n_declarations)
+    count = sum(len(entries_) for declaration_ in parsed for entries_ in declaration_)
+    del parsed
+    gc.collect()
+    tracemalloc.start()
+    parsed, _ = _parse_corpus(documents, n_declarations)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    return seconds, size, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory and construction time of parsed entities, slotted vs plain classes')
+    parser.add_argument('--declarations', type=int, default=100_000)
+    parser.add_argument('--distinct', type=int, default=500, help='number of distinct synthetic documents')
+    args = parser.parse_args()
+
+    documents = [json.dumps(synthetic.make_document(f'bench-{i_}', 2016 + i_ % 8, seed=i_)['data'])
+                 for i_ in range(args.distinct)]
+    with _plain_entities():
+        results = {'plain classes': _measure(documents, args.declarations)}
+    results['slotted + interned'] = _measure(documents, args.declarations)
+
+    print(f'{args.declarations} declarations, {results["plain classes"][2]} entities')
+    for name, (seconds, size, count) in results.items():
+        print(f'{name:>18}: {seconds:6.2f} s, {size / 1024 ** 2:7.1f} MB, {size / count:6.0f} bytes/entity')
+
+
+if __name__ == '__main__':
+    main()
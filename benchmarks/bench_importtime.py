@@ -0,0 +1,76 @@
+# Import time of the modules the command line uses, and startup time of main.py itself.
+# Each module is imported in a fresh interpreter with -X importtime; the median of the runs is shown,
+# with the imported modules that take the most time on their own (without what they import).
+# usage (from repository root):
+#   python -m benchmarks.bench_importtime --repeat 5
+#   python main.py bench importtime --modules nazkTools --top 15
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = ('main', 'logconfig', 'settings', 'entities.declaration', 'api', 'reports', 'docx', 'batch',
+           'nazkTools')
+
+# main.py runs that must not load anything heavy
+STARTUP_COMMANDS = (('--version',), ('--help',), ('batch', '--help'))
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# -X importtime of one import in a fresh interpreter: {module: (self us, cumulative us)} in import order
+# module None - only what the interpreter imports on startup (site)
+def _import_times(module: str|None) -> dict[str, tuple[int, int]]:
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}' if module else 'pass'],
+                            cwd=_ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line_ in result.stderr.splitlines():
+        if not line_.startswith('import time:') or 'self [us]' in line_:
+            continue
+        self_, cumulative_, name_ = (part_.strip() for part_ in line_[len('import time:'):].split('|'))
+        times[name_.strip()] = (int(self_), int(cumulative_))
+    return times
+
+
+def _wall_time(args: tuple[str, ...]) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, 'main.py', *args], cwd=_ROOT, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def _wall_time_of_python() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import time of modules and startup time of main.py')
+    parser.add_argument('--modules', nargs='+', default=MODULES)
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per module')
+    parser.add_argument('--top', type=int, default=5, help='slowest imported modules shown per module')
+    args = parser.parse_args()
+
+    baseline = statistics.median(_wall_time_of_python() for _ in range(args.repeat))
+    print(f'python -c pass: {baseline * 1000:.0f} ms wall (interpreter startup, included below)')
+    for command_ in STARTUP_COMMANDS:
+        seconds = statistics.median(_wall_time(command_) for _ in range(args.repeat))
+        print(f'main.py {" ".join(command_)}: {seconds * 1000:.0f} ms wall')
+
+    startup_modules = set(_import_times(None))
+    print(f'\nimport time, median of {args.repeat} runs (cumulative, ms):')
+    for module_ in args.modules:
+        runs = [_import_times(module_) for _ in range(args.repeat)]
+        cumulative = statistics.median(run_[module_][1] for run_ in runs if module_ in run_)
+        self_times = {name_: statistics.median(run_.get(name_, (0, 0))[0] for run_ in runs) for name_ in runs[0]
+                      if name_ not in startup_modules}
+        slowest = sorted(self_times.items(), key=lambda item_: item_[1], reverse=True)[:args.top]
+        print(f'{module_:>22}: {cumulative / 1000:7.1f}   slowest: '
+              + ', '.join(f'{name_} {us_ / 1000:.1f}' for name_, us_ in slowest))
+
+
+if __name__ == '__main__':
+    main()
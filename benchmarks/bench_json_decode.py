@@ -0,0 +1,42 @@
+# Decode time per declaration document for every available JSON backend (api.jsondecode).
+# 'json (str)' is how responses were decoded before - response.text first, then the stdlib parser.
+# usage (from repository root):
+#   python -m benchmarks.bench_json_decode --size 100 --repeat 100
+import argparse
+import json
+import time
+
+from api import jsondecode
+from benchmarks import synthetic
+
+
+def _time_per_call(fn, raw, repeat: int) -> float:
+    fn(raw) # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(raw)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decode time per declaration document for every JSON backend')
+    parser.add_argument('--size', type=int, default=100, help='entries multiplier for steps 3, 11 and 12')
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    document = synthetic.make_document('bench', 2023, seed=1, size=args.size)
+    raw = json.dumps(document, ensure_ascii=False).encode('utf-8')
+    print(f'document size: {len(raw) / 1024:.0f} KB, {args.repeat} runs per backend')
+
+    timings = {'json (str)': _time_per_call(lambda raw_: json.loads(raw_.decode('utf-8')), raw, args.repeat)}
+    for name, loads_ in jsondecode.BACKENDS.items():
+        timings[f'{name} (bytes)'] = _time_per_call(loads_, raw, args.repeat)
+    baseline = timings['json (str)']
+    for name, seconds in timings.items():
+        print(f'{name:>14}: {seconds * 1000:8.3f} ms/document  ({baseline / seconds:.2f}x)')
+    if 'orjson' not in jsondecode.BACKENDS:
+        print('orjson is not installed - pip install orjson to compare')
+
+
+if __name__ == '__main__':
+    main()
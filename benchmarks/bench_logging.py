@@ -0,0 +1,90 @@
+# Per-declaration cost of logging: the same declarations are loaded (from the document cache, no network),
+# parsed and compared at ERROR, INFO and DEBUG level; the difference to ERROR is what the log calls cost.
+# At DEBUG every record is formatted and written (to os.devnull) - including the whole document
+# get_declaration_document logs; at ERROR the calls must cost next to nothing.
+# usage (from repository root):
+#   python -m benchmarks.bench_logging --declarants 20 --size 5
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+import settings
+from benchmarks import synthetic
+
+LEVELS = ('ERROR', 'INFO', 'DEBUG')
+
+
+# loads, parses and compares every declarant's declarations the way check_person does, returns seconds
+def _run(declarants: list[list[dict]]) -> float:
+    import nazkTools
+    start = time.perf_counter()
+    for cards_ in declarants:
+        context = nazkTools.AnalysisContext()
+        prev_decl = None
+        for decl_ in nazkTools.parse_declaration_cards({'data': cards_}):
+            document = nazkTools.get_declaration_document(decl_)
+            decl_.full_name = nazkTools.get_full_name(document)
+            decl_.set_document(document)
+            decl_.parse_steps(nazkTools.ANALYSIS_STEPS)
+            context.add_declaration(decl_)
+            nazkTools.run_comparison(context, prev_decl or decl_, decl_)
+            prev_decl = decl_
+    return time.perf_counter() - start
+
+
+# fills the document cache (settings.CACHE_DIR) with synthetic declarations and times _run() at every level
+def _measure(args):
+    from api import get_document_cache
+    cache = get_document_cache()
+    declarants = []
+    for declarant_id_ in range(1, args.declarants + 1):
+        cards_ = synthetic.make_cards(declarant_id_, 2016, 2023)
+        for card_ in cards_:
+            document = synthetic.make_document(card_['id'], card_['declaration_year'], seed=declarant_id_,
+                                               size=args.size)
+            cache.put(card_['id'], json.dumps(document, ensure_ascii=False).encode('utf-8'))
+        declarants.append(cards_)
+    n_declarations = sum(len(cards_) for cards_ in declarants)
+
+    # records are formatted and written as configure_logging() would do it, to a stream that discards them
+    devnull = open(os.devnull, 'w', encoding='utf-8')
+    handler = logging.StreamHandler(devnull)
+    handler.setFormatter(logging.Formatter('{asctime} [{levelname}] {message}', datefmt="%H:%M", style='{'))
+    root = logging.getLogger()
+    handlers, root.handlers = root.handlers, [handler]
+
+    _run(declarants[:1]) # warm-up: imports, exchange rates, parser registry
+    timings = {}
+    for level_ in LEVELS:
+        root.setLevel(level_)
+        timings[level_] = min(_run(declarants) for _ in range(args.repeat))
+    root.handlers = handlers
+    devnull.close()
+
+    print(f'{n_declarations} declarations ({args.declarants} declarants), size {args.size}, '
+          f'best of {args.repeat} runs')
+    baseline = timings['ERROR'] / n_declarations
+    for level_, seconds_ in timings.items():
+        per_declaration = seconds_ / n_declarations
+        print(f'{level_:>6}: {per_declaration * 1000:8.3f} ms/declaration  '
+              f'(+{(per_declaration - baseline) * 1000:.3f} ms, {per_declaration / baseline:.2f}x)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-declaration overhead of logging at DEBUG vs ERROR')
+    parser.add_argument('--declarants', type=int, default=20, help='synthetic declarants, 8 declarations each')
+    parser.add_argument('--size', type=int, default=5, help='entries multiplier for steps 3, 11 and 12')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per level, the fastest one is shown')
+    args = parser.parse_args()
+
+    settings.CACHE_ENABLED = True
+    with tempfile.TemporaryDirectory(prefix='nazk-bench-logging-') as cache_dir_:
+        settings.CACHE_DIR = cache_dir_
+        _measure(args)
+
+
+if __name__ == '__main__':
+    main()
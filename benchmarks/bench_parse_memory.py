@@ -0,0 +1,87 @@
+# Peak memory and time to parse one full declaration (ANALYSIS_STEPS) - whole-document decoding
+# (api.jsondecode.loads) vs the streaming parser (api.jsondecode.iter_object_items, needs ijson).
+# Peak is measured with tracemalloc from the moment raw bytes are at hand (or the cache file is opened),
+# so it shows the memory the parsing itself takes; buffers allocated inside C parsers are not traced.
+# usage (from repository root):
+#   python -m benchmarks.bench_parse_memory --size 200
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from api import jsondecode
+from benchmarks import synthetic
+from entities.declaration import Declaration
+from entities.steps import STEP_PARSERS
+from logconfig import configure_logging
+from nazkTools import ANALYSIS_STEPS
+
+
+def _new_declaration() -> Declaration:
+    return Declaration(1, 'bench', 1, '2024-03-01', 2023, 1)
+
+
+def _parse_decoded(raw: bytes):
+    declaration = _new_declaration()
+    declaration.set_document(jsondecode.loads(raw)['data'])
+    declaration.parse_steps(ANALYSIS_STEPS)
+    return declaration
+
+
+def _parse_stream(stream):
+    declaration = _new_declaration()
+    keys = STEP_PARSERS.get_required_keys(ANALYSIS_STEPS) | {'step_1'}
+    with stream:
+        declaration.parse_step_items(jsondecode.iter_object_items(stream, 'data', keys), ANALYSIS_STEPS,
+                                     keep=('step_1',))
+    return declaration
+
+
+# returns (peak bytes, bytes still held by the parsed declaration, seconds)
+def _measure(fn) -> tuple[int, int, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak, retained, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Peak memory and time to parse one full declaration, whole vs streaming')
+    parser.add_argument('--size', type=int, default=200, help='entries multiplier for steps 3, 11 and 12')
+    args = parser.parse_args()
+    configure_logging()
+
+    raw = json.dumps(synthetic.make_document('bench', 2023, seed=1, size=args.size),
+                     ensure_ascii=False).encode('utf-8')
+    print(f'document size: {len(raw) / 1024:.0f} KB, json backend: {jsondecode.get_backend()}')
+    _parse_decoded(raw) # warm-up (imports, backend selection)
+
+    paths = {'decode whole document': lambda: _parse_decoded(raw)}
+    if jsondecode.STREAMING_AVAILABLE:
+        fd, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(raw)
+        paths['stream from bytes'] = lambda: _parse_stream(io.BytesIO(raw))
+        paths['stream from cache file'] = lambda: _parse_stream(open(path, 'rb'))
+    else:
+        path = None
+        print('ijson is not installed - pip install ijson to compare with the streaming parser')
+    try:
+        for name, fn in paths.items():
+            peak, retained, seconds = _measure(fn)
+            print(f'{name:>22}: peak {peak / 1024:8.0f} KB, retained {retained / 1024:8.0f} KB, '
+                  f'{seconds * 1000:7.1f} ms')
+    finally:
+        if path is not None:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
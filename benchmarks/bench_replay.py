@@ -0,0 +1,71 @@
+# Throughput of check_person against a local NAZK API stand-in - no network needed.
+# usage (from repository root):
+#   python -m benchmarks.bench_replay --synthetic 20 --latency 0.05
+#   python -m benchmarks.bench_replay --fixtures recorded/ --latency 0.1 --error-rate 0.05
+# fixtures are recorded by running nazkTools with NAZK_RECORD_DIR=<dir> (and caches disabled)
+import argparse
+import tempfile
+import time
+
+import settings
+from api import FixtureStore, NazkStandIn, set_client, NazkClient
+from benchmarks import synthetic
+from logconfig import configure_logging
+
+
+# checks every name against the stand-in serving the store and prints throughput
+def _replay(args, store: FixtureStore, names: list[str]):
+    documents = store.count_documents()
+
+    # every run must go to the stand-in
+    settings.CACHE_ENABLED = False
+    settings.HTTP_BACKOFF = 0.01
+    import nazkTools
+
+    with NazkStandIn(store, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                     error_status=args.error_status, seed=args.seed) as stand_in:
+        settings.API_BASE_URL = stand_in.base_url
+        set_client(NazkClient())
+        failed = 0
+        start = time.perf_counter()
+        for name_ in names:
+            try:
+                nazkTools.check_person(name_, workers=args.workers)
+            except Exception:
+                failed += 1
+        elapsed = time.perf_counter() - start
+        served = stand_in.requests_served
+        injected = stand_in.errors_injected
+
+    print(f'names: {len(names)} (failed: {failed}), documents: {documents}, workers: {args.workers}, '
+          f'latency: {args.latency}s, error rate: {args.error_rate}')
+    print(f'requests served: {served} (errors injected: {injected})')
+    print(f'elapsed: {elapsed:.2f}s, {len(names) / elapsed * 60:.1f} names/min, '
+          f'{documents / elapsed * 60:.1f} documents/min')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throughput of check_person against a local NAZK API stand-in')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--fixtures', help='directory with recorded fixtures')
+    source.add_argument('--synthetic', type=int, metavar='N', help='generate N synthetic declarants')
+    parser.add_argument('--latency', type=float, default=0.05, help='stand-in latency per response, seconds')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--workers', type=int, default=settings.LOAD_WORKERS)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    configure_logging()
+
+    if args.fixtures:
+        store = FixtureStore(args.fixtures)
+        _replay(args, store, list(store.iter_queries()))
+    else:
+        with tempfile.TemporaryDirectory(prefix='nazk-fixtures-') as root_:
+            store = FixtureStore(root_)
+            _replay(args, store, synthetic.write_fixtures(store, args.synthetic))
+
+
+if __name__ == '__main__':
+    main()
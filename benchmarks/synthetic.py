@@ -0,0 +1,113 @@
+# Synthetic NAZK API responses for offline benchmarks.
+# Documents have the same shape as real ones for every step nazkTools reads (1, 2, 3, 6, 11, 12);
+# other steps are marked as not applicable. Generation is deterministic for a given seed.
+import json
+import random
+
+from api.replay import FixtureStore
+
+LAST_NAMES = ['КОВАЛЕНКО', 'ШЕВЧЕНКО', 'БОНДАРЕНКО', 'ТКАЧЕНКО', 'КРАВЧЕНКО', 'ОЛІЙНИК', 'ШЕВЧУК', 'ПОЛІЩУК']
+FIRST_NAMES = ['Олександр', 'Ірина', 'Петро', 'Оксана', 'Андрій', 'Наталія', 'Микола', 'Тетяна']
+MIDDLE_NAMES = ['Іванович', 'Петрівна', 'Миколайович', 'Андріївна', 'Сергійович', 'Олегівна']
+PROPERTY_TYPES = ['Квартира', 'Житловий будинок', 'Земельна ділянка', 'Гараж', 'Інше']
+CITIES = ['Київ', 'Львів', 'Одеса', 'Харків', 'Дніпро', 'Вінниця']
+CURRENCIES = ['UAH', 'UAH', 'USD', 'EUR']
+SAVINGS_TYPES = ['Готівкові кошти', 'Кошти, розміщені на банківських рахунках']
+EARNINGS_TYPES = ['Заробітна плата отримана за основним місцем роботи', 'Подарунок у грошовій формі',
+                  'Дохід від відчуження нерухомого майна', 'Пенсія']
+VEHICLES = [('Toyota', 'Camry'), ('Volkswagen', 'Passat'), ('Skoda', 'Octavia'), ('BMW', 'X5'), ('Renault', 'Logan')]
+
+
+def _step(data: list|dict) -> dict:
+    return {'data': data}
+
+
+def _name(rnd: random.Random) -> tuple[str, str, str]:
+    return rnd.choice(LAST_NAMES), rnd.choice(FIRST_NAMES), rnd.choice(MIDDLE_NAMES)
+
+
+# returns one full declaration document (as returned by /v2/documents/{id})
+# seed defines the declarant - family, property and vehicles stay the same across years (assets acquired
+# after the declaration year are left out), amounts of earnings and savings change from year to year
+# size multiplies the number of entries in steps 3, 11 and 12 - use it to get documents of realistic size
+def make_document(declaration_id: str, year: int, seed: int = 0, size: int = 1) -> dict:
+    rnd = random.Random(seed)
+    year_rnd = random.Random(seed * 7919 + year)
+    last_name, first_name, middle_name = _name(rnd)
+    relatives = [{'id': str(100 + i), 'lastname': last_name, 'firstname': rnd.choice(FIRST_NAMES),
+                  'middlename': rnd.choice(MIDDLE_NAMES), 'subjectRelation': rnd.choice(['дружина', 'син', 'донька'])}
+                 for i in range(rnd.randint(0, 3))]
+    owner_ids = ['1'] + [r['id'] for r in relatives]
+
+    property_ = []
+    for i in range(rnd.randint(1, 4) * size):
+        owners = rnd.sample(owner_ids, rnd.randint(1, len(owner_ids)))
+        acquire_year = rnd.randint(2000, 2024)
+        entry_ = {
+            'city': rnd.choice(CITIES), 'objectType': rnd.choice(PROPERTY_TYPES),
+            'owningDate': f'{rnd.randint(1, 28):02}.{rnd.randint(1, 12):02}.{acquire_year}',
+            'totalArea': f'{rnd.randint(20, 2000)},{rnd.randint(0, 9)}',
+            'rights': [{'ownershipType': 'Власність', 'rightBelongs': owner_,
+                        'percent-ownership': str(100 // len(owners))} for owner_ in owners],
+            'costAssessment': str(rnd.randint(10, 5000) * 1000) if rnd.random() > 0.3 else '[Не відомо]'}
+        if acquire_year <= year:
+            property_.append(entry_)
+    vehicles = []
+    for i in range(rnd.randint(0, 2)):
+        brand, model = rnd.choice(VEHICLES)
+        acquire_year = rnd.randint(2010, 2024)
+        entry_ = {
+            'objectType': 'Легковий автомобіль', 'brand': brand, 'model': model,
+            'graduationYear': str(rnd.randint(2000, acquire_year)),
+            'owningDate': f'{rnd.randint(1, 28):02}.{rnd.randint(1, 12):02}.{acquire_year}',
+            'rights': [{'ownershipType': 'Власність', 'rightBelongs': rnd.choice(owner_ids)}],
+            'costDate': str(rnd.randint(50, 2000) * 1000)}
+        if acquire_year <= year:
+            vehicles.append(entry_)
+    earnings = [{'sizeIncome': str(year_rnd.randint(1000, 2000000)), 'objectType': year_rnd.choice(EARNINGS_TYPES),
+                 'rights': [{'rightBelongs': year_rnd.choice(owner_ids)}]}
+                for _ in range(year_rnd.randint(1, 6) * size)]
+    # every family member keeps savings in every year, so nobody's savings disappear
+    savings = [{'sizeAssets': str(year_rnd.randint(100, 500000)), 'assetsCurrency': year_rnd.choice(CURRENCIES),
+                'objectType': year_rnd.choice(SAVINGS_TYPES), 'rights': [{'rightBelongs': owner_}]}
+               for owner_ in owner_ids for _ in range(year_rnd.randint(1, 3) * size)]
+
+    data = {'step_0': {'data': {'declaration_type': 1, 'declaration_year': year}},
+            'step_1': _step({'lastname': last_name, 'firstname': first_name, 'middlename': middle_name,
+                             'workPlace': 'Державна установа', 'workPost': 'Начальник відділу'})}
+    data['step_2'] = _step(relatives) if relatives else {'isNotApplicable': 1}
+    data['step_3'] = _step(property_) if property_ else {'isNotApplicable': 1}
+    data['step_6'] = _step(vehicles) if vehicles else {'isNotApplicable': 1}
+    data['step_11'] = _step(earnings)
+    data['step_12'] = _step(savings)
+    for i_ in (4, 5, 7, 8, 9, 10, 13, 14, 15, 16):
+        data[f'step_{i_}'] = {'isNotApplicable': 1}
+    return {'id': declaration_id, 'data': data}
+
+
+# returns search result items (as in documents/list 'data') for one declarant with yearly declarations
+def make_cards(declarant_id: int, first_year: int, last_year: int) -> list[dict]:
+    return [{'id': f'synthetic-{declarant_id}-{year_}', 'user_declarant_id': declarant_id,
+             'declaration_type': 1, 'type': 1, 'declaration_year': year_,
+             'date': f'{year_ + 1}-03-{(declarant_id % 28) + 1:02}T10:00:00', 'corruption_affected': 0}
+            for year_ in range(first_year, last_year + 1)]
+
+
+# fills fixture store with n_names synthetic declarants, each with yearly declarations for years
+# returns list of full names to search for
+def write_fixtures(store: FixtureStore, n_names: int, years: tuple[int, int] = (2016, 2023),
+                   size: int = 1, page_size: int = 100) -> list[str]:
+    names = []
+    for declarant_id in range(1, n_names + 1):
+        rnd = random.Random(declarant_id)
+        full_name = ' '.join(_name(rnd)) + f' {declarant_id}'
+        query = ' '.join(full_name.casefold().split()) # how NazkStandIn sees unified name
+        cards = make_cards(declarant_id, *years)
+        for page_, start_ in enumerate(range(0, len(cards), page_size), start=1):
+            page_data = {'count': len(cards), 'data': cards[start_:start_ + page_size]}
+            store.save_list(query, page_, json.dumps(page_data, ensure_ascii=False).encode('utf-8'))
+        for card_ in cards:
+            document = make_document(card_['id'], card_['declaration_year'], seed=declarant_id, size=size)
+            store.save_document(card_['id'], json.dumps(document, ensure_ascii=False).encode('utf-8'))
+        names.append(full_name)
+    return names
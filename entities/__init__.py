@@ -0,0 +1,4 @@
+import logging
+
+# records of the package go nowhere unless the application configures logging (logconfig.configure_logging)
+logging.getLogger(__name__).addHandler(logging.NullHandler())
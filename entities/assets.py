@@ -0,0 +1,30 @@
+# diffing of asset lists (Property, Vehicle) of two declarations by their identity_key:
+# one pass over each list instead of comparing every asset of one list with every asset of the other
+
+
+# --- class AssetDiff ---
+# removed - assets of prev_list with no equal asset in curr_list, in prev_list order
+# added - assets of curr_list with no equal asset in prev_list, in curr_list order
+# matches - one list per asset of curr_list: equal assets of prev_list in prev_list order (empty for added ones);
+# together with curr_list gives the same pairs, in the same order, as a nested loop over curr_list and prev_list
+# prev_keys, curr_keys - identity keys of the lists if they are already at hand (see entities.timeline)
+class AssetDiff:
+
+    def __init__(self, prev_list: list, curr_list: list, prev_keys: list[tuple] = None, curr_keys: list[tuple] = None):
+        if prev_keys is None:
+            prev_keys = [asset_.identity_key for asset_ in prev_list]
+        if curr_keys is None:
+            curr_keys = [asset_.identity_key for asset_ in curr_list]
+        prev_by_key: dict[tuple, list] = {}
+        for key_, asset_ in zip(prev_keys, prev_list):
+            prev_by_key.setdefault(key_, []).append(asset_)
+        curr_key_set = set(curr_keys)
+        self.curr_list: list = curr_list
+        self.removed: list = [asset_ for key_, asset_ in zip(prev_keys, prev_list) if key_ not in curr_key_set]
+        self.added: list = [asset_ for key_, asset_ in zip(curr_keys, curr_list) if key_ not in prev_by_key]
+        self.matches: list[list] = [prev_by_key.get(key_, []) for key_ in curr_keys]
+
+    # (curr asset, equal prev asset) pairs
+    def changed(self) -> list[tuple]:
+        return [(asset_, old_) for asset_, matches_ in zip(self.curr_list, self.matches) for old_ in matches_]
+    # --- class AssetDiff end ---
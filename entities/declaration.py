@@ -1,8 +1,18 @@
+import json
+import zlib
+
 from .person import Person
 from .property import Property
 from .savings import SavingsEntry
 from .earnings import EarningsEntry
 from .vehicle import Vehicle
+from .steps import STEP_PARSERS
+
+
+# what Declaration.release_document() does with the raw document once requested steps are parsed:
+# keep - keep it as it is; drop - forget it, steps parsed later get it again from document_loader
+# (the document cache); compressed - keep it as zlib-compressed json, decompressed for each later parse
+RAW_RETENTION_POLICIES = ('keep', 'drop', 'compressed')
 
 
 # TODO rewrite as dataclass
@@ -16,7 +26,16 @@ class Declaration:
     3 type 1 - Після звільнення
     4 type 1 - Кандидата на посаду
       type 3 - Виправлена кандидата на посаду
+
+    Details from the full document are parsed lazily by step parsers from entities.steps.STEP_PARSERS:
+    each step is parsed the first time one of its attributes is accessed, or up front with parse_steps().
+    Until then the attribute is not set on the instance at all - see __getattr__.
     """
+
+    # callable(declaration) -> raw document, used to get the document again for steps that were not parsed
+    # while it was at hand (e.g. declaration restored from the parsed declarations cache); set by nazkTools
+    document_loader = None
+
     def __init__(self, declaration_type: str|int, declaration_id: str,
                  declarant_id: str|int, submit_date: str, year: str|int, type_: str|int,
                  corruption_affected: str|int = None):
@@ -66,22 +85,125 @@ class Declaration:
                 # print(declaration_type)
 
         #extended info with details, loaded later directly from declaration page
-        self.data = {}
+        self.loaded: bool = False
+        self._document: dict|None = None # 'data' of the full document response, source for lazy parsing
+        self._compressed_document: bytes|None = None # _document kept by 'compressed' retention
+        self._retention: str = 'keep' # see release_document()
+        self._parsed_steps: set[int] = set()
         self.full_name = None
-        self.persons: dict[str, Person] = {}
-        self.property_list: list[Property] = []
-        self.vehicle_list: list[Vehicle] = []
-
-        self.earnings: list[EarningsEntry] = []
-        self.earnings_by_person: dict[str|int, int|float] = {}
-
-        self.savings: list[SavingsEntry] = []
+        # filled in by step parsers on first access:
+        # persons: dict[str, Person]                                - step 2
+        # property_list: list[Property]                             - step 3
+        # vehicle_list: list[Vehicle]                               - step 6
+        # earnings: list[EarningsEntry]                             - step 11
+        # earnings_ledger: MoneyLedger                              - step 11
+        # earnings_by_person: dict[str|int, int|float]              - step 11
+        # savings: list[SavingsEntry]                               - step 12
+        # savings_ledger: MoneyLedger                               - step 12
+        # savings_by_currency: dict[str, int|float]                 - step 12
+        # savings_by_prsn_and_curr: dict[str, dict[str, str|int]]   - step 12
         self.savings_by_person: dict[str|int, int|float] = {}
-        self.savings_by_currency: dict[str, int|float] = {}
-        self.savings_by_prsn_and_curr: dict[str, dict[str, str|int]] = {}
     # __init__ end
 
 
+    # called only for attributes that are not set yet - parses the step that provides the attribute
+    def __getattr__(self, name):
+        step_ = STEP_PARSERS.get_step_for(name) if not name.startswith('_') else None
+        if step_ is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self.parse_steps((step_,))
+        if name not in self.__dict__:
+            # only a card from search results, nothing to parse yet
+            return STEP_PARSERS[step_].get_default(name)
+        return self.__dict__[name]
+
+
+    # raw steps of the full document, {'step_N': step data}
+    # if the document was released, it is loaded again just for this call
+    @property
+    def data(self) -> dict[str, object]:
+        document = self._get_document()
+        if document is None:
+            return {}
+        return {key_: step_['data'] for key_, step_ in document.items()
+                if isinstance(step_, dict) and 'data' in step_}
+
+
+    # attaches full document ('data' of /v2/documents/{id} response); steps are parsed from it on demand
+    def set_document(self, document: dict):
+        self._document = document
+        self._compressed_document = None
+        self.loaded = True
+
+
+    # applies retention policy (one of RAW_RETENTION_POLICIES) to the attached raw document;
+    # the policy is remembered and applied again whenever the document is brought back for lazy parsing
+    def release_document(self, retention: str = 'keep'):
+        if retention not in RAW_RETENTION_POLICIES:
+            raise ValueError(f'Unknown raw retention policy: {retention}, expected one of {RAW_RETENTION_POLICIES}')
+        self._retention = retention
+        if retention == 'keep' or self._document is None:
+            return
+        if retention == 'compressed':
+            self._compressed_document = zlib.compress(
+                json.dumps(self._document, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        self._document = None
+
+
+    # attached raw document, or the one restored from compressed copy or document_loader
+    # (not attached - the caller decides whether to keep it); None if there is nothing to load it from
+    def _get_document(self) -> dict|None:
+        if self._document is not None:
+            return self._document
+        if self._compressed_document is not None:
+            return json.loads(zlib.decompress(self._compressed_document).decode('utf-8'))
+        if not self.loaded or Declaration.document_loader is None:
+            return None
+        return Declaration.document_loader(self)
+
+
+    # parses given steps now, if they were not parsed yet; steps without a parser are ignored
+    def parse_steps(self, steps):
+        steps = self._get_unparsed_steps(steps)
+        if not steps:
+            return
+        document = self._get_document()
+        if document is None:
+            return
+        if self._retention == 'keep':
+            self._document = document
+        self._parse_items(document.items(), steps)
+
+
+    # parses given steps from raw (key, step) pairs instead of the attached document - e.g. from a streaming
+    # json parser, so the full document is never built; marks declaration as loaded
+    # returns raw steps listed in keep, {'step_N': step}
+    def parse_step_items(self, items, steps, keep=()) -> dict:
+        raw_steps = self._parse_items(items, self._get_unparsed_steps(steps), keep)
+        self.loaded = True
+        return raw_steps
+
+
+    def _get_unparsed_steps(self, steps) -> list[int]:
+        return [step_ for step_ in steps if step_ not in self._parsed_steps and step_ in STEP_PARSERS]
+
+
+    def _parse_items(self, items, steps, keep=()) -> dict:
+        try:
+            return STEP_PARSERS.parse_items(self, items, steps, self._parsed_steps, keep)
+        except BaseException:
+            # drop whatever the failed step has set, so the next access parses it again instead of reading defaults
+            for step_ in steps:
+                if step_ not in self._parsed_steps:
+                    for attribute_ in STEP_PARSERS[step_].attributes:
+                        self.__dict__.pop(attribute_, None)
+            raise
+
+
+    def is_step_parsed(self, step: int) -> bool:
+        return step in self._parsed_steps
+
+
     def get_person_name_by_id(self, person_id) -> str:
         if person_id == 1 or person_id == '1':
             return self.full_name
@@ -90,7 +212,7 @@ class Declaration:
 
 
     def __str__(self):
-        if not self.data:
+        if not self.loaded:
             return (f'\n --- Declaration # {self.declaration_id} --- \n type: {self.written_type} \n '
                      f'declarant id: {self.declarant_id} \n year: {self.year} \n submit date: {self.submit_date}')
         else:
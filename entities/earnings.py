@@ -1,15 +1,27 @@
-import logging as log
+import logging
+from dataclasses import dataclass, field
 
-# TODO rewrite as dataclass
+from .interning import intern_value
+from .ledger import MoneyLedger
+
+log = logging.getLogger(__name__)
+
+
+# slotted - a corpus run holds millions of entries; compared by identity, like before
+# not frozen: frozen dataclass __init__ is ~3x slower, and earnings are the most numerous entities
+@dataclass(slots=True, eq=False)
 class EarningsEntry:
-    def __init__(self, amount: str|float, owner: str|int, origin: str):
-        self.amount: float = float(amount)
-        self.owner = owner
-        self.origin: str = origin
+    amount: float
+    owner: str|int
+    origin: str
+    amount_taxed: float = field(init=False)
+
+    def __post_init__(self):
+        self.amount = float(self.amount)
         if self._is_salary():
-            self.amount_taxed: float = self.__subtract_taxes()
+            self.amount_taxed = self.__subtract_taxes()
         else:
-            self.amount_taxed: float = self.amount
+            self.amount_taxed = self.amount
 
     def __subtract_taxes(self) -> float:
         return round(self.amount * 0.8, 2)
@@ -34,25 +46,22 @@ def get_earnings_entries(step11_data: list[dict]) -> list[EarningsEntry]:
         if 'rights' in entry_:
             if len(entry_['rights']) > 1:
                 log.warning('Some strange shit with rights field for savings entry')
-            e_= EarningsEntry(amount_, entry_['rights'][0]['rightBelongs'], entry_['objectType'])
+            e_= EarningsEntry(amount_, entry_['rights'][0]['rightBelongs'], intern_value(entry_['objectType']))
         elif 'person_who_care' in entry_:
             if len(entry_['person_who_care']) > 1:
                 log.warning('Some strange shit with person_who_care field for savings entry')
-            e_= EarningsEntry(amount_, entry_['person_who_care'][0]['person'], entry_['objectType'])
+            e_= EarningsEntry(amount_, entry_['person_who_care'][0]['person'],
+                              intern_value(entry_['objectType']))
         assert e_ is not None
         earnings_entries.append(e_)
     return earnings_entries
 
 # splitter for step_11
+# view over MoneyLedger - use the ledger directly if it's already built (Declaration.earnings_ledger)
 def sum_taxed_and_split_by_person(earnings_entries: list[EarningsEntry]) -> dict[str|int, int|float]:
-    earnings_by_person = {}
-    for entry_ in earnings_entries:
-        if str(entry_.owner) in earnings_by_person:
-            earnings_by_person[entry_.owner] += round(entry_.amount_taxed, 2)
-        else:
-            earnings_by_person[entry_.owner] = round(entry_.amount_taxed, 2)
-            log.debug(f'earnings entries taxed, split by person and summed up, result: {earnings_by_person}')
+    earnings_by_person = MoneyLedger.from_earnings(earnings_entries).sum_by_owner(taxed=True)
+    log.debug('earnings entries taxed, split by person and summed up, result: %s', earnings_by_person)
     return earnings_by_person
 
 def get_total_earnings(earnings_entries: list[EarningsEntry]) -> int:
-    return sum([entry_.amount for entry_ in earnings_entries])
+    return MoneyLedger.from_earnings(earnings_entries).total() if earnings_entries else 0
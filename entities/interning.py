@@ -0,0 +1,15 @@
+# the same few strings (currencies, ownership and object types) repeat in every entry of every declaration -
+# interning keeps one copy of each instead of one per entry
+
+
+class _Interned(dict):
+
+    def __missing__(self, value):
+        self[value] = value
+        return value
+
+
+# intern_value(value) -> the first seen value equal to this one; for fields with a small set of values only,
+# interned values are kept for the lifetime of the process
+# a plain dict lookup (no python-level call on a hit), several times cheaper than a sys.intern wrapper
+intern_value = _Interned().__getitem__
@@ -0,0 +1,117 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+
+from .ledger import MoneyLedger
+from .rates import ExchangeRates, get_exchange_rates
+
+
+# change of savings between two neighbouring declarations, in UAH, for every rate the currencies could have
+# had during the year of the later declaration (from yearly min to yearly max)
+# ratio_low/ratio_high - change relative to income after taxes, None if no income was declared
+@dataclass(frozen=True)
+class SavingsChangeRange:
+    low: float
+    high: float
+    income_taxed: float
+    ratio_low: float|None
+    ratio_high: float|None
+
+    # change is larger than income even with the rates that make it the smallest
+    def exceeds_income(self) -> bool:
+        return self.ratio_low is not None and self.ratio_low > 1
+
+
+# --- class SavingsChangeRanges ---
+# SavingsChangeRange for every declaration of a timeline, computed for many of them at once
+# declarations - sorted as they are compared, added all at once or in batches as they arrive (extend());
+# the first one is compared with itself (zero change)
+# change in each currency is declared amount minus amount in the previous declaration (0 if absent there);
+# a positive change is smallest at the minimum rate, a negative one - at the maximum, and the other way round
+# for the upper bound - so each bound is the sum of element-wise min (max) of both conversions
+class SavingsChangeRanges:
+
+    def __init__(self, declarations: Iterable = (), rates: ExchangeRates = None):
+        self._rates: ExchangeRates = rates or get_exchange_rates()
+        self._index_by_id: dict[str, int] = {}
+        # declared amount by currency in the last added declaration
+        self._last_totals: dict[str, float] = {}
+        self.low: np.ndarray = np.zeros(0, dtype=np.float64)
+        self.high: np.ndarray = np.zeros(0, dtype=np.float64)
+        self.income_taxed: np.ndarray = np.zeros(0, dtype=np.float64)
+        self.ratio_low: np.ndarray = np.zeros(0, dtype=np.float64)
+        self.ratio_high: np.ndarray = np.zeros(0, dtype=np.float64)
+        self.extend(declarations)
+
+    # adds the next declarations of the timeline; raises ValueError (and adds nothing) if a rate is missing
+    def extend(self, declarations: Iterable):
+        declarations = list(declarations)
+        if not declarations:
+            return
+        n = len(declarations)
+        savings = MoneyLedger.concat([decl_.savings_ledger for decl_ in declarations])
+        earnings = MoneyLedger.concat([decl_.earnings_ledger for decl_ in declarations])
+        years = np.array([decl_.year for decl_ in declarations], dtype=np.int32)
+        # currency columns: those of the last added declaration first, then new ones
+        labels = list(self._last_totals)
+        labels += [currency_ for currency_ in savings.currency_labels if currency_ not in self._last_totals]
+        column_of = {currency_: i_ for i_, currency_ in enumerate(labels)}
+        columns_of_codes = np.array([column_of[currency_] for currency_ in savings.currency_labels], dtype=np.int64)
+        n_currencies = len(labels)
+        # declared amount by declaration and currency, row 0 - the declaration before these
+        totals = np.zeros((n + 1, n_currencies), dtype=np.float64)
+        if len(savings):
+            totals[1:] = np.bincount(savings.declarations.astype(np.int64) * n_currencies
+                                     + columns_of_codes[savings.currencies],
+                                     savings.amounts, minlength=n * n_currencies).reshape(n, n_currencies)
+        if self._index_by_id:
+            totals[0, :len(self._last_totals)] = list(self._last_totals.values())
+        else:
+            totals[0] = totals[1]
+        changes = totals[1:] - totals[:-1]
+        rows, columns = np.nonzero(changes)
+        amounts = changes[rows, columns]
+        currencies = np.array(labels, dtype=str)[columns] if len(columns) else []
+        at_min = self._rates.convert(amounts, currencies, years[rows], 'min')
+        at_max = self._rates.convert(amounts, currencies, years[rows], 'max')
+        low = np.bincount(rows, np.minimum(at_min, at_max), minlength=n)
+        high = np.bincount(rows, np.maximum(at_min, at_max), minlength=n)
+        income_taxed = earnings.sum_by_declaration(taxed=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            has_income = income_taxed != 0
+            ratio_low = np.where(has_income, low / income_taxed, np.nan)
+            ratio_high = np.where(has_income, high / income_taxed, np.nan)
+
+        offset = len(self)
+        for i_, decl_ in enumerate(declarations):
+            self._index_by_id[decl_.declaration_id] = offset + i_
+        self._last_totals = dict(zip(labels, totals[-1].tolist()))
+        self.low = np.concatenate((self.low, low))
+        self.high = np.concatenate((self.high, high))
+        self.income_taxed = np.concatenate((self.income_taxed, income_taxed))
+        self.ratio_low = np.concatenate((self.ratio_low, ratio_low))
+        self.ratio_high = np.concatenate((self.ratio_high, ratio_high))
+
+    def __len__(self) -> int:
+        return len(self.low)
+
+    # range for the i-th declaration (compared with the one before it)
+    def __getitem__(self, i: int) -> SavingsChangeRange:
+        has_income = not np.isnan(self.ratio_low[i])
+        return SavingsChangeRange(float(self.low[i]), float(self.high[i]), float(self.income_taxed[i]),
+                                  float(self.ratio_low[i]) if has_income else None,
+                                  float(self.ratio_high[i]) if has_income else None)
+
+    def __contains__(self, declaration) -> bool:
+        return declaration.declaration_id in self._index_by_id
+
+    # range for the given declaration (one of those the ranges were computed for)
+    def get(self, declaration) -> SavingsChangeRange:
+        return self[self._index_by_id[declaration.declaration_id]]
+
+    # indices of declarations where savings grew more than income even under the most favorable rates
+    def exceeding_income(self) -> np.ndarray:
+        with np.errstate(invalid='ignore'):
+            return np.nonzero(self.ratio_low > 1)[0]
+    # --- class SavingsChangeRanges end ---
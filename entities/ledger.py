@@ -0,0 +1,163 @@
+from collections.abc import Callable, Iterable
+
+import numpy as np
+
+
+class _Encoder:
+
+    def __init__(self):
+        self.labels: list = []
+        self._codes: dict = {}
+
+    def encode(self, label) -> int:
+        code = self._codes.get(label)
+        if code is None:
+            code = self._codes[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+
+# --- class MoneyLedger ---
+# columnar store of money entries (savings or earnings) of one declaration or of many
+# every entry is a row: amount, currency code, owner code, year, kind code (type of savings or income),
+# index of the declaration, and for earnings - amount after taxes, rounded as sum_taxed_and_split_by_person did
+# codes point into currency_labels, owner_labels and kind_labels and are assigned in order of first appearance,
+# so group-by results come out in the same order as dicts that were built entry by entry
+# sums are taken with np.bincount, which adds values one by one in row order - bit-for-bit the same floats
+# as summing in a python loop (np.sum adds pairwise and may differ in the last digits)
+class MoneyLedger:
+
+    def __init__(self, amounts: np.ndarray, currencies: np.ndarray, owners: np.ndarray, years: np.ndarray,
+                 kinds: np.ndarray, declarations: np.ndarray, currency_labels: list[str], owner_labels: list,
+                 kind_labels: list[str], taxed: np.ndarray = None, n_declarations: int = 1):
+        self.amounts: np.ndarray = amounts # float64
+        self.currencies: np.ndarray = currencies # int32 codes
+        self.owners: np.ndarray = owners # int32 codes
+        self.years: np.ndarray = years # int32
+        self.kinds: np.ndarray = kinds # int32 codes
+        self.declarations: np.ndarray = declarations # int32, 0..n_declarations-1
+        self.taxed: np.ndarray = taxed if taxed is not None else amounts
+        self.currency_labels: list[str] = currency_labels
+        self.owner_labels: list = owner_labels
+        self.kind_labels: list[str] = kind_labels
+        self.n_declarations: int = n_declarations
+
+    @classmethod
+    def empty(cls) -> 'MoneyLedger':
+        return cls._from_rows([], [], [], [], 0)
+
+    # rows of one declaration: amounts and taxed are floats, the rest are labels
+    @classmethod
+    def _from_rows(cls, amounts: list[float], currencies: list[str], owners: list, kinds: list[str],
+                   year: int, taxed: list[float] = None) -> 'MoneyLedger':
+        currency_, owner_, kind_ = _Encoder(), _Encoder(), _Encoder()
+        n = len(amounts)
+        return cls(np.array(amounts, dtype=np.float64),
+                   np.fromiter(map(currency_.encode, currencies), dtype=np.int32, count=n),
+                   np.fromiter(map(owner_.encode, owners), dtype=np.int32, count=n),
+                   np.full(n, year, dtype=np.int32),
+                   np.fromiter(map(kind_.encode, kinds), dtype=np.int32, count=n),
+                   np.zeros(n, dtype=np.int32),
+                   currency_.labels, owner_.labels, kind_.labels,
+                   taxed=np.array(taxed, dtype=np.float64) if taxed is not None else None)
+
+    # ledger of savings entries (step 12) of one declaration
+    @classmethod
+    def from_savings(cls, savings_entries: list, year: int = 0) -> 'MoneyLedger':
+        return cls._from_rows([entry_.amount for entry_ in savings_entries],
+                              [entry_.currency for entry_ in savings_entries],
+                              [entry_.owner for entry_ in savings_entries],
+                              [entry_.type_ for entry_ in savings_entries], year)
+
+    # ledger of earnings entries (step 11) of one declaration, all amounts are in UAH
+    @classmethod
+    def from_earnings(cls, earnings_entries: list, year: int = 0) -> 'MoneyLedger':
+        return cls._from_rows([entry_.amount for entry_ in earnings_entries],
+                              ['UAH'] * len(earnings_entries),
+                              [entry_.owner for entry_ in earnings_entries],
+                              [entry_.origin for entry_ in earnings_entries], year,
+                              taxed=[round(entry_.amount_taxed, 2) for entry_ in earnings_entries])
+
+    # ledger of per-currency totals ({'currency': amount}), owner and kind are left empty
+    @classmethod
+    def from_totals(cls, amounts_by_currency: dict[str, int|float], year: int = 0) -> 'MoneyLedger':
+        n = len(amounts_by_currency)
+        return cls._from_rows([float(amount_) for amount_ in amounts_by_currency.values()],
+                              list(amounts_by_currency), [''] * n, [''] * n, year)
+
+    # one ledger for many declarations; rows keep their order, declarations are numbered in the order of ledgers
+    # (a ledger that is already a concatenation takes as many numbers as it has declarations)
+    @classmethod
+    def concat(cls, ledgers: Iterable['MoneyLedger']) -> 'MoneyLedger':
+        ledgers = list(ledgers)
+        if not ledgers:
+            return cls.empty()
+        currency_, owner_, kind_ = _Encoder(), _Encoder(), _Encoder()
+        remap = lambda encoder_, labels_, codes_: (
+            np.fromiter(map(encoder_.encode, labels_), dtype=np.int32, count=len(labels_))[codes_]
+            if len(labels_) else codes_)
+        declarations = []
+        offset = 0
+        for ledger_ in ledgers:
+            declarations.append(ledger_.declarations + offset)
+            offset += ledger_.n_declarations
+        return cls(np.concatenate([ledger_.amounts for ledger_ in ledgers]),
+                   np.concatenate([remap(currency_, l_.currency_labels, l_.currencies) for l_ in ledgers]),
+                   np.concatenate([remap(owner_, l_.owner_labels, l_.owners) for l_ in ledgers]),
+                   np.concatenate([ledger_.years for ledger_ in ledgers]),
+                   np.concatenate([remap(kind_, l_.kind_labels, l_.kinds) for l_ in ledgers]),
+                   np.concatenate(declarations),
+                   currency_.labels, owner_.labels, kind_.labels,
+                   taxed=np.concatenate([ledger_.taxed for ledger_ in ledgers]), n_declarations=offset)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def _values(self, taxed: bool) -> np.ndarray:
+        return self.taxed if taxed else self.amounts
+
+    # ---- aggregation ----
+
+    def total(self, taxed: bool = False) -> float:
+        return float(np.bincount(np.zeros(len(self), dtype=np.int32), self._values(taxed), minlength=1)[0])
+
+    # {'currency': amount}
+    def sum_by_currency(self, taxed: bool = False) -> dict[str, float]:
+        sums = np.bincount(self.currencies, self._values(taxed), minlength=len(self.currency_labels))
+        return dict(zip(self.currency_labels, sums.tolist()))
+
+    # {owner: amount}, amounts of all currencies are added up as they are
+    def sum_by_owner(self, taxed: bool = False) -> dict[str|int, float]:
+        sums = np.bincount(self.owners, self._values(taxed), minlength=len(self.owner_labels))
+        return dict(zip(self.owner_labels, sums.tolist()))
+
+    # {owner: {'currency': amount}}, currencies of each owner in order of their first appearance for that owner
+    def sum_by_owner_and_currency(self, taxed: bool = False) -> dict[str|int, dict[str, float]]:
+        n_currencies = len(self.currency_labels)
+        pairs = self.owners.astype(np.int64) * n_currencies + self.currencies
+        sums = np.bincount(pairs, self._values(taxed), minlength=len(self.owner_labels) * n_currencies).tolist()
+        unique_pairs, first_rows = np.unique(pairs, return_index=True)
+        result: dict[str|int, dict[str, float]] = {}
+        for pair_ in unique_pairs[np.argsort(first_rows, kind='stable')].tolist():
+            owner_, currency_ = divmod(pair_, n_currencies)
+            result.setdefault(self.owner_labels[owner_], {})[self.currency_labels[currency_]] = sums[pair_]
+        return result
+
+    # array of sums for every declaration of the ledger, in declaration order
+    def sum_by_declaration(self, values: np.ndarray = None, taxed: bool = False) -> np.ndarray:
+        values = self._values(taxed) if values is None else values
+        return np.bincount(self.declarations, values, minlength=self.n_declarations)
+
+    # ---- conversion ----
+
+    # amounts converted to UAH, one value per row
+    # rate_of(currency, year) -> UAH per unit; called once per distinct (currency, year) pair of the ledger
+    def to_uah(self, rate_of: Callable[[str, int], float], taxed: bool = False) -> np.ndarray:
+        if not len(self):
+            return np.zeros(0, dtype=np.float64)
+        pairs = np.stack((self.currencies, self.years), axis=1)
+        unique_pairs, pair_index = np.unique(pairs, axis=0, return_inverse=True)
+        rates = np.array([rate_of(self.currency_labels[currency_], year_)
+                          for currency_, year_ in unique_pairs.tolist()], dtype=np.float64)
+        return self._values(taxed) * rates[pair_index.reshape(-1)]
+    # --- class MoneyLedger end ---
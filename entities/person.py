@@ -1,13 +1,20 @@
+from dataclasses import dataclass
 
-# TODO rewrite as dataclass
+from .interning import intern_value
+
+
+# slotted and frozen - a corpus run holds millions of entities; compared by identity, like before
+@dataclass(slots=True, frozen=True, eq=False)
 class Person:
-    def __init__(self, person_id: str|int, full_name: str, relation_type: str, mentions: list[str|int]):
-        if not isinstance(person_id, int) and not person_id.isdigit():
+    person_id: int
+    full_name: str
+    relation_type: str
+    mentions: list[str|int]
+
+    def __post_init__(self):
+        if not isinstance(self.person_id, int) and not self.person_id.isdigit():
             raise BaseException("Person ID is not valid")
-        self.person_id: int = int(person_id)
-        self.full_name: str = full_name
-        self.relation_type: str = relation_type
-        self.mentions: list[str|int] = mentions
+        object.__setattr__(self, 'person_id', int(self.person_id))
 
 
 # -------- Tools ----------
@@ -17,7 +24,7 @@ def get_person_entries(step2_data: list[dict]) -> dict[str, Person]:
     for entry_ in step2_data:
         full_name = entry_['lastname'] + ' ' + entry_['firstname'] + ' ' + entry_['middlename']
         person_ = Person(person_id=entry_['id'], full_name=full_name,
-                         relation_type=entry_['subjectRelation'], mentions=['usage'])
+                         relation_type=intern_value(entry_['subjectRelation']), mentions=['usage'])
         related_persons[entry_['id']] = person_
     return related_persons
 
@@ -1,15 +1,23 @@
+from dataclasses import dataclass
 
-# TODO rewrite as dataclass
+from .interning import intern_value
+
+
+# slotted and frozen - a corpus run holds millions of entities
+# equality and hash are defined below (same type, area and acquire date), so the generated ones are not used
+@dataclass(slots=True, frozen=True, eq=False)
 class Property:
-    def __init__(self, place: str, property_type: str, acquire_date: str, total_area: str|int|float,
-                ownership_type: str, owners: dict[int: str], cost: str|int):
-        self.place: str = place
-        self.property_type: str = property_type.lower()
-        self.acquire_date: str = acquire_date
-        self.total_area: float = float(total_area)
-        self.ownership_type: str = ownership_type
-        self.owners: dict[int: str] = owners
-        self.cost: int | str = cost
+    place: str
+    property_type: str
+    acquire_date: str
+    total_area: float
+    ownership_type: str
+    owners: dict[int: str]
+    cost: int | str
+
+    def __post_init__(self):
+        object.__setattr__(self, 'property_type', intern_value(self.property_type.lower()))
+        object.__setattr__(self, 'total_area', float(self.total_area))
 
     def get_changes_since(self, other):
         #TODO add logs
@@ -48,6 +56,14 @@ class Property:
                 and self.total_area == other.total_area
                 and self.acquire_date == other.acquire_date)
 
+    # what __eq__ compares, as one hashable value - equal properties have equal keys
+    @property
+    def identity_key(self) -> tuple[str, float, str]:
+        return self.property_type, self.total_area, self.acquire_date
+
+    def __hash__(self):
+        return hash(self.identity_key)
+
     def __str__(self):
         if self.cost:
             price_str = f'{self.cost} грн'
@@ -92,7 +108,7 @@ def get_property_entries(step3_data: list[dict]) -> list[Property]:
             place = entry_['ua_cityType']
         else:
             raise BaseException("No city or ua_cityType found")
-        ownership_type = entry_['rights'][0]['ownershipType']
+        ownership_type = intern_value(entry_['rights'][0]['ownershipType'])
         if 'власність' in ownership_type.lower():
             owners = {}
             for item in entry_['rights']:
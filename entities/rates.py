@@ -0,0 +1,218 @@
+import csv
+import logging
+import threading
+from collections.abc import Iterable
+from datetime import date, datetime
+
+import numpy as np
+
+import settings
+
+log = logging.getLogger(__name__)
+
+# Hand-maintained yearly rates (UAH per unit) - used for every currency and year the rates file does not cover
+
+USD_AVG_EXCH_RATE = {'2016': 25.55, '2017': 26.59,
+                     '2018': 27.20, '2019': 25.84,
+                     '2020': 26.96, '2021': 27.29,
+                     '2022': 32.34, '2023': 36.57 }
+
+EUR_AVG_EXCH_RATE = {'2016': 28.29, '2017': 30.00,
+                     '2018': 32.14, '2019': 28.95,
+                     '2020': 30.79, '2021': 32.31,
+                     '2022': 33.98, '2023': 39.56 }
+
+USD_EXCH_RATE_RANGE = {
+    '2016': (23.26 , 27.25), '2017': (25.44 , 28.06),
+    '2018': (25.91 , 28.87), '2019': (23.25 , 28.27),
+    '2020': (23.68 , 28.60), '2021': (26.06 , 28.43),
+    '2022': (27.28 , 36.57), '2023': (36.01 , 37.98),
+    '2024': (37.45 , 42.04) }
+
+EUR_EXCH_RATE_RANGE = {
+    '2016': (28.29 , 28.29), '2017': (30.00 , 30.00), # not updated, avg used
+    '2018': (32.14 , 32.14), '2019': (28.95 , 28.95), # not updated, avg used
+    '2020': (30.79 , 30.79), '2021': (32.31 , 32.31), # not updated, avg used
+    '2022': (29.28 , 38.95), '2023': (38.23 , 42.21),
+    '2024': (40.37 , 46.24) }
+
+BUILTIN_AVG_RATES = {'USD': USD_AVG_EXCH_RATE, 'EUR': EUR_AVG_EXCH_RATE}
+BUILTIN_RATE_RANGES = {'USD': USD_EXCH_RATE_RANGE, 'EUR': EUR_EXCH_RATE_RANGE}
+
+# what convert() can use as a yearly rate
+RATE_KINDS = ('avg', 'min', 'max')
+
+_DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y')
+
+
+def _parse_date(value: str) -> date:
+    for format_ in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), format_).date()
+        except ValueError:
+            pass
+    raise ValueError(f'Unknown date format: {value}')
+
+
+# --- class ExchangeRates ---
+# official daily exchange rates (UAH per unit of currency) of all currencies, from a local file:
+# csv with a header and columns date (YYYY-MM-DD or DD.MM.YYYY), currency (ISO code), rate and optional units
+# (rate is for that many units, 1 if absent), or parquet with the same columns (needs pyarrow)
+# rates of every currency are kept as two sorted arrays - dates and rates; yearly average, min and max
+# are computed on first request and remembered
+# a currency or year missing from the file falls back to the hand-maintained tables above (USD and EUR);
+# anything else raises ValueError
+# one instance is shared by all threads (see get_exchange_rates())
+class ExchangeRates:
+
+    def __init__(self, daily: dict[str, tuple[np.ndarray, np.ndarray]] = None):
+        # currency -> (dates, datetime64[D], ascending; rates, float64)
+        self._daily: dict[str, tuple[np.ndarray, np.ndarray]] = daily or {}
+        # (currency, year) -> (avg, min, max)
+        self._yearly: dict[tuple[str, int], tuple[float|None, float|None, float|None]] = {}
+        self._lock = threading.Lock()
+
+    # rows - (date, currency, rate per unit); order does not matter
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple[date|str, str, float]]) -> 'ExchangeRates':
+        by_currency: dict[str, tuple[list, list]] = {}
+        for date_, currency_, rate_ in rows:
+            dates_, rates_ = by_currency.setdefault(currency_.strip().upper(), ([], []))
+            dates_.append(date_)
+            rates_.append(rate_)
+        daily = {}
+        for currency_, (dates_, rates_) in by_currency.items():
+            dates_ = np.array(dates_, dtype='datetime64[D]')
+            order = np.argsort(dates_, kind='stable')
+            daily[currency_] = dates_[order], np.array(rates_, dtype=np.float64)[order]
+        return cls(daily)
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'ExchangeRates':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            rows = [(_parse_date(row_['date']), row_['currency'],
+                     float(row_['rate'].replace(',', '.')) / float(row_.get('units') or 1))
+                    for row_ in reader]
+        log.info('%d exchange rates loaded from %s', len(rows), path)
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_parquet(cls, path: str) -> 'ExchangeRates':
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('pyarrow is needed to read exchange rates from parquet - pip install pyarrow')
+        table = pyarrow.parquet.read_table(path).to_pydict()
+        units = table.get('units') or [1] * len(table['rate'])
+        dates = [date_ if isinstance(date_, date) else _parse_date(date_) for date_ in table['date']]
+        log.info('%d exchange rates loaded from %s', len(dates), path)
+        return cls.from_rows(zip(dates, table['currency'],
+                                 (float(rate_) / float(units_ or 1) for rate_, units_ in zip(table['rate'], units))))
+
+    # by file extension: .parquet or csv
+    @classmethod
+    def load(cls, path: str) -> 'ExchangeRates':
+        if path.lower().endswith('.parquet'):
+            return cls.from_parquet(path)
+        return cls.from_csv(path)
+
+    # currencies with daily rates (UAH and the built-in USD and EUR are always supported)
+    def currencies(self) -> list[str]:
+        return sorted(self._daily)
+
+    # official rate on the given day - the last one published on or before it
+    def rate_on(self, currency: str, day: date|str) -> float:
+        if currency == 'UAH':
+            return 1.0
+        if currency not in self._daily:
+            raise ValueError(f'No daily exchange rates for currency: {currency}')
+        dates_, rates_ = self._daily[currency]
+        index = int(np.searchsorted(dates_, np.datetime64(day, 'D'), side='right')) - 1
+        if index < 0:
+            raise ValueError(f'No {currency} exchange rate on or before {day}')
+        return float(rates_[index])
+
+    def yearly_avg(self, currency: str, year: str|int) -> float:
+        return self._get_rate(currency, int(year), 'avg')
+
+    # (min, max) of the rate over the year
+    def yearly_range(self, currency: str, year: str|int) -> tuple[float, float]:
+        return self._get_rate(currency, int(year), 'min'), self._get_rate(currency, int(year), 'max')
+
+    # amounts in UAH, one per amount; currencies and years are sequences of the same length or single values
+    # kind - which yearly rate to use: 'avg', 'min' or 'max'
+    # rates are looked up once per distinct (currency, year) pair
+    def convert(self, amounts, currencies, years, kind: str = 'avg') -> np.ndarray:
+        if kind not in RATE_KINDS:
+            raise ValueError(f'Unknown rate kind: {kind}, expected one of {RATE_KINDS}')
+        amounts = np.asarray(amounts, dtype=np.float64)
+        if not amounts.size:
+            return np.zeros(amounts.shape, dtype=np.float64)
+        currencies = np.broadcast_to(np.asarray(currencies, dtype=str), amounts.shape)
+        years = np.broadcast_to(np.asarray(years).astype(np.int32), amounts.shape)
+        currency_labels, currency_codes = np.unique(currencies, return_inverse=True)
+        year_labels, year_codes = np.unique(years, return_inverse=True)
+        pairs, pair_codes = np.unique(currency_codes.reshape(-1) * len(year_labels) + year_codes.reshape(-1),
+                                      return_inverse=True)
+        rates = np.array([self._get_rate(str(currency_labels[pair_ // len(year_labels)]),
+                                         int(year_labels[pair_ % len(year_labels)]), kind)
+                          for pair_ in pairs.tolist()], dtype=np.float64)
+        return amounts * rates[pair_codes.reshape(amounts.shape)]
+
+    def _get_rate(self, currency: str, year: int, kind: str) -> float:
+        if currency == 'UAH':
+            return 1.0
+        key = (currency, year)
+        yearly = self._yearly.get(key)
+        if yearly is None:
+            yearly = self._compute_yearly(currency, year)
+            with self._lock:
+                self._yearly[key] = yearly
+        rate = yearly[RATE_KINDS.index(kind)]
+        if rate is None:
+            log.error('No %s exchange rate for currency %s in %s', kind, currency, year)
+            raise ValueError(f'No {kind} exchange rate for currency {currency} in {year}')
+        return rate
+
+    # (avg, min, max), None for the values the hand-maintained tables do not have
+    def _compute_yearly(self, currency: str, year: int) -> tuple[float|None, float|None, float|None]:
+        if currency in self._daily:
+            dates_, rates_ = self._daily[currency]
+            start, end = np.searchsorted(dates_, [np.datetime64(f'{year}-01-01'), np.datetime64(f'{year + 1}-01-01')])
+            if end > start:
+                year_rates = rates_[start:end]
+                return float(year_rates.mean()), float(year_rates.min()), float(year_rates.max())
+        avg_ = BUILTIN_AVG_RATES.get(currency, {}).get(str(year))
+        range_ = BUILTIN_RATE_RANGES.get(currency, {}).get(str(year))
+        if avg_ is None and range_ is None:
+            log.error('No exchange rate for currency %s in %s', currency, year)
+            raise ValueError(f'No exchange rate for currency {currency} in {year}')
+        min_, max_ = range_ if range_ is not None else (None, None)
+        return avg_, min_, max_
+    # --- class ExchangeRates end ---
+
+
+# -------- Tools ----------
+
+_exchange_rates: ExchangeRates = None
+_rates_lock = threading.Lock()
+
+
+# shared ExchangeRates, loaded from settings.EXCHANGE_RATES_FILE on first use
+# (only the hand-maintained tables if the file is not set)
+def get_exchange_rates() -> ExchangeRates:
+    global _exchange_rates
+    if _exchange_rates is None:
+        with _rates_lock:
+            if _exchange_rates is None:
+                path = settings.EXCHANGE_RATES_FILE
+                _exchange_rates = ExchangeRates.load(path) if path else ExchangeRates()
+    return _exchange_rates
+
+
+# replaces shared ExchangeRates, e.g. with one loaded from another file; None - load from settings again
+def set_exchange_rates(rates: ExchangeRates|None):
+    global _exchange_rates
+    with _rates_lock:
+        _exchange_rates = rates
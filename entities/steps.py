@@ -0,0 +1,233 @@
+import logging
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+from .earnings import get_earnings_entries
+from .ledger import MoneyLedger
+from .person import get_person_entries, get_self_entry
+from .property import get_property_entries
+from .savings import get_savings_entries
+from .vehicle import get_vehicle_entries
+
+log = logging.getLogger(__name__)
+
+# Registry of parsers for the steps of a full declaration document.
+# Each parser says which Declaration attribute it fills from its step, which derived aggregates it computes
+# afterwards, which other raw steps it reads and which exceptions are logged instead of being raised.
+# Declaration asks the registry to parse a step the first time one of the step's attributes is read.
+
+
+# derived value computed right after the step is parsed, e.g. savings split by person
+# compute(declaration, document) - declaration already has the step's main attribute set
+@dataclass(frozen=True)
+class Aggregate:
+    attribute: str
+    compute: Callable
+    default: Callable = dict
+
+
+@dataclass
+class StepParser:
+    step: int
+    attribute: str
+    parse: Callable # parse(step data) -> value of attribute
+    default: Callable = list # value of attribute (factory) when the step is absent, not applicable or failed
+    aggregates: tuple[Aggregate, ...] = ()
+    requires: tuple[int, ...] = () # other steps of the raw document this parser reads
+    catch: tuple[type[BaseException], ...] = () # logged and swallowed, attribute keeps default value
+    missing_warning: str = None # logged if the step is marked as not applicable, %s - declaration id
+    key: str = field(init=False) # 'step_N'
+
+    def __post_init__(self):
+        self.key = f'step_{self.step}'
+
+    @property
+    def attributes(self) -> tuple[str, ...]:
+        return (self.attribute,) + tuple(aggregate_.attribute for aggregate_ in self.aggregates)
+
+    def get_default(self, attribute: str):
+        if attribute == self.attribute:
+            return self.default()
+        return next(aggregate_.default() for aggregate_ in self.aggregates if aggregate_.attribute == attribute)
+
+    # fills declaration attributes from step_ (document[self.key], None if absent)
+    def run(self, declaration, step_: dict|None, document: dict):
+        declaration.__dict__[self.attribute] = self.default()
+        for aggregate_ in self.aggregates:
+            declaration.__dict__[aggregate_.attribute] = aggregate_.default()
+        if step_ is None:
+            log.warning('Step %d is absent in declaration %s', self.step, declaration.declaration_id)
+            return
+        if 'isNotApplicable' in step_ and str(step_['isNotApplicable']) == '1':
+            log.info('Step %d missed, isNotApplicable is true for this step', self.step)
+            if self.missing_warning:
+                log.warning(self.missing_warning, declaration.declaration_id)
+            return
+        if 'data' not in step_:
+            return
+        log.debug('data found for step %d', self.step)
+        self._guarded(declaration, self.attribute, self.parse, step_['data'])
+        for aggregate_ in self.aggregates:
+            self._guarded(declaration, aggregate_.attribute, aggregate_.compute, declaration, document)
+        log.debug('step %d parsed', self.step)
+
+    def _guarded(self, declaration, attribute: str, fn: Callable, *args):
+        try:
+            declaration.__dict__[attribute] = fn(*args)
+        except self.catch as e:
+            log.error('%s caught in declaration %s, year: %s, while loading full declaration, step %d',
+                      e.__class__.__name__, declaration.declaration_id, declaration.year, self.step)
+            log.exception(e)
+
+
+class StepRegistry:
+
+    def __init__(self):
+        self._by_step: dict[int, StepParser] = {}
+        self._by_key: dict[str, StepParser] = {}
+        self._by_attribute: dict[str, StepParser] = {}
+
+    def register(self, parser: StepParser):
+        self._by_step[parser.step] = parser
+        self._by_key[parser.key] = parser
+        for attribute_ in parser.attributes:
+            self._by_attribute[attribute_] = parser
+
+    def __contains__(self, step: int) -> bool:
+        return step in self._by_step
+
+    def __getitem__(self, step: int) -> StepParser:
+        return self._by_step[step]
+
+    def steps(self) -> tuple[int, ...]:
+        return tuple(sorted(self._by_step))
+
+    # step that fills given Declaration attribute, None if no registered parser does
+    def get_step_for(self, attribute: str) -> int|None:
+        parser = self._by_attribute.get(attribute)
+        return parser.step if parser is not None else None
+
+    # keys of the raw steps needed to parse given steps: their own and the ones their parsers require
+    def get_required_keys(self, steps: Iterable[int]) -> set[str]:
+        keys = set()
+        for step_ in steps:
+            parser = self._by_step.get(step_)
+            if parser is not None:
+                keys.add(parser.key)
+                keys.update(f'step_{required_}' for required_ in parser.requires)
+        return keys
+
+    # parses requested steps of the document into declaration in one pass over the document;
+    # steps without a registered parser are ignored, so unneeded steps cost nothing
+    # every successfully parsed step is added to parsed (also when a later step fails)
+    def parse(self, declaration, document: dict, steps: Iterable[int], parsed: set[int]):
+        self.parse_items(declaration, document.items(), steps, parsed)
+
+    # same as parse(), but takes raw steps as (key, step) pairs, e.g. straight from a streaming json parser
+    # a raw step stays referenced only until it is parsed, unless another wanted parser requires it or its key
+    # is in keep; a parser whose required step has not arrived yet waits for it (or for the end of items)
+    # returns the raw steps that were kept, {'step_N': step}
+    def parse_items(self, declaration, items: Iterable[tuple[str, object]], steps: Iterable[int],
+                    parsed: set[int], keep: Iterable[str] = ()) -> dict:
+        wanted = {step_ for step_ in steps if step_ in self._by_step}
+        kept_keys = set(keep)
+        for step_ in wanted:
+            kept_keys.update(f'step_{required_}' for required_ in self._by_step[step_].requires)
+        document = {}
+        if not wanted and not kept_keys:
+            return document
+        waiting: list[tuple[StepParser, object]] = []
+        for key_, step_ in items:
+            if key_ in kept_keys:
+                document[key_] = step_
+            parser = self._by_key.get(key_)
+            if parser is not None and parser.step in wanted:
+                waiting.append((parser, step_))
+            if waiting:
+                waiting = self._run_ready(declaration, waiting, document, wanted, parsed)
+        for parser, step_ in waiting:
+            self._run(declaration, parser, step_, document, wanted, parsed)
+        for step_ in sorted(wanted):
+            self._run(declaration, self._by_step[step_], None, document, wanted, parsed)
+        return document
+
+    # runs waiting parsers whose required steps are all in document, returns the ones still waiting
+    def _run_ready(self, declaration, waiting: list, document: dict, wanted: set[int], parsed: set[int]) -> list:
+        still_waiting = []
+        for parser, step_ in waiting:
+            if all(f'step_{required_}' in document for required_ in parser.requires):
+                self._run(declaration, parser, step_, document, wanted, parsed)
+            else:
+                still_waiting.append((parser, step_))
+        return still_waiting
+
+    @staticmethod
+    def _run(declaration, parser: StepParser, step_, document: dict, wanted: set[int], parsed: set[int]):
+        parser.run(declaration, step_, document)
+        parsed.add(parser.step)
+        wanted.discard(parser.step)
+
+
+# -------- Aggregates ----------
+
+# adds main figure to the list of related persons - to resolve references in property and savings/earnings
+def _add_self_entry(declaration, document: dict) -> dict:
+    persons = declaration.__dict__['persons']
+    persons['1'] = get_self_entry(document['step_1']['data'])
+    log.debug('key figure added as a person with id: 1, relation type: self')
+    return persons
+
+
+# columnar copies of earnings and savings - the dict aggregates below are computed from them
+def _build_earnings_ledger(declaration, document: dict) -> MoneyLedger:
+    return MoneyLedger.from_earnings(declaration.__dict__['earnings'], declaration.year)
+
+
+def _build_savings_ledger(declaration, document: dict) -> MoneyLedger:
+    return MoneyLedger.from_savings(declaration.__dict__['savings'], declaration.year)
+
+
+# same as sum_taxed_and_split_by_person()
+def _sum_earnings_taxed(declaration, document: dict):
+    return declaration.__dict__['earnings_ledger'].sum_by_owner(taxed=True)
+
+
+# same as split_by_person_avg()
+def _split_savings_by_person(declaration, document: dict):
+    # TODO savings_by_person (convert_and_split_by_person_v1) works incorrectly, needs to be rewritten
+    return declaration.__dict__['savings_ledger'].sum_by_owner_and_currency()
+
+
+# same as sum_savings_by_currency_avg()
+def _sum_savings_by_currency(declaration, document: dict):
+    return declaration.__dict__['savings_ledger'].sum_by_currency()
+
+
+STEP_PARSERS = StepRegistry()
+
+# Члени сім'ї та пов'язані особи
+STEP_PARSERS.register(StepParser(
+    step=2, attribute='persons', parse=get_person_entries, default=dict,
+    aggregates=(Aggregate('persons', _add_self_entry),), requires=(1,), catch=(KeyError,),
+    missing_warning='No persons found in declaration %s'))
+# Нерухомість
+STEP_PARSERS.register(StepParser(
+    step=3, attribute='property_list', parse=get_property_entries, catch=(BaseException,),
+    missing_warning='No real estate property found in declaration %s'))
+# Рухоме майно (транспортні засоби)
+STEP_PARSERS.register(StepParser(
+    step=6, attribute='vehicle_list', parse=get_vehicle_entries, catch=(BaseException,),
+    missing_warning='No vehicles found in declaration %s'))
+# Доходи, у тому числі подарунки
+STEP_PARSERS.register(StepParser(
+    step=11, attribute='earnings', parse=get_earnings_entries,
+    aggregates=(Aggregate('earnings_ledger', _build_earnings_ledger, default=MoneyLedger.empty),
+                Aggregate('earnings_by_person', _sum_earnings_taxed)),
+    missing_warning='Earnings not found in declaration %s'))
+# Грошові активи
+STEP_PARSERS.register(StepParser(
+    step=12, attribute='savings', parse=get_savings_entries,
+    aggregates=(Aggregate('savings_ledger', _build_savings_ledger, default=MoneyLedger.empty),
+                Aggregate('savings_by_prsn_and_curr', _split_savings_by_person),
+                Aggregate('savings_by_currency', _sum_savings_by_currency)),
+    missing_warning='Savings not found in declaration %s'))
@@ -0,0 +1,150 @@
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+from .assets import AssetDiff
+
+# Assets of all declarations of one declarant, matched across the whole timeline in one pass.
+# Every asset gets a stable id (AssetTrack) when its declaration is added: an asset continues the track of an
+# equal asset (same identity key) from any earlier declaration, so it keeps its id after a gap.
+# Pairwise comparisons take their diffs from here - keys are computed once per asset, not once per pair.
+
+
+# what is tracked for one kind of assets
+# attribute - Declaration attribute with the list of assets; key(asset) -> hashable identity key
+# value(asset), owners(asset) - recorded for every appearance
+@dataclass(frozen=True)
+class AssetKind:
+    name: str
+    attribute: str
+    key: Callable
+    value: Callable
+    owners: Callable
+
+
+ASSET_KINDS: dict[str, AssetKind] = {kind_.name: kind_ for kind_ in (
+    AssetKind('property', 'property_list', lambda asset_: asset_.identity_key,
+              lambda asset_: asset_.cost, lambda asset_: asset_.owners),
+    AssetKind('vehicle', 'vehicle_list', lambda asset_: asset_.identity_key,
+              lambda asset_: asset_.cost, lambda asset_: asset_.owners),
+    # savings entries have no account number - an account is the owner's savings of one type in one currency
+    AssetKind('savings', 'savings', lambda entry_: (entry_.owner, entry_.currency, entry_.type_),
+              lambda entry_: entry_.amount, lambda entry_: entry_.owner),
+)}
+
+
+# one asset through the timeline; appearances - indices of declarations (in the order they were added)
+# where it is declared, values and owners - as declared in each of them
+@dataclass(slots=True)
+class AssetTrack:
+    asset_id: int
+    kind: str
+    key: tuple
+    appearances: list[int] = field(default_factory=list)
+    assets: list = field(default_factory=list)
+    values: list = field(default_factory=list)
+    owners: list = field(default_factory=list)
+
+    @property
+    def first_seen(self) -> int:
+        return self.appearances[0]
+
+    @property
+    def last_seen(self) -> int:
+        return self.appearances[-1]
+
+    # (index of the last declaration before a gap, index where the asset is declared again)
+    def gaps(self) -> list[tuple[int, int]]:
+        return [(prev_, next_) for prev_, next_ in zip(self.appearances, self.appearances[1:]) if next_ - prev_ > 1]
+
+    # index of the declaration before the given one where the asset was declared, None if there is none
+    def seen_before(self, index: int) -> int|None:
+        earlier = [index_ for index_ in self.appearances if index_ < index]
+        return earlier[-1] if earlier else None
+
+    # asset, value and owners as declared in the declaration with the given index
+    # (ValueError if the asset is not declared there)
+    def asset_at(self, index: int):
+        return self.assets[self.appearances.index(index)]
+
+    def value_at(self, index: int):
+        return self.values[self.appearances.index(index)]
+
+    def owners_at(self, index: int):
+        return self.owners[self.appearances.index(index)]
+
+
+# --- class AssetTimeline ---
+# declarations are added one by one, in the order they are compared (sorted major declarations)
+# assets with equal keys within one declaration (e.g. two equal land plots) get separate tracks -
+# the n-th of them continues the n-th track with that key
+class AssetTimeline:
+
+    def __init__(self, kinds: Iterable[str] = ASSET_KINDS):
+        self.kinds: tuple[str, ...] = tuple(kinds)
+        self.declarations: list = []
+        self.tracks: list[AssetTrack] = []
+        self._index_by_id: dict[str, int] = {}
+        # kind -> per declaration: identity keys and track ids of its assets, in declaration order
+        self._keys: dict[str, list[list[tuple]]] = {kind_: [] for kind_ in self.kinds}
+        self._track_ids: dict[str, list[list[int]]] = {kind_: [] for kind_ in self.kinds}
+        self._tracks_by_key: dict[tuple[str, tuple], list[int]] = {}
+
+    # adds the next declaration (full one, with its asset steps parsed), returns its index
+    def add(self, declaration) -> int:
+        index = len(self.declarations)
+        self.declarations.append(declaration)
+        self._index_by_id[declaration.declaration_id] = index
+        for kind_ in self.kinds:
+            asset_kind = ASSET_KINDS[kind_]
+            assets = getattr(declaration, asset_kind.attribute)
+            keys = [asset_kind.key(asset_) for asset_ in assets]
+            track_ids = []
+            occurrences: dict[tuple, int] = {}
+            for key_, asset_ in zip(keys, assets):
+                n_ = occurrences[key_] = occurrences.get(key_, -1) + 1
+                same_key = self._tracks_by_key.setdefault((kind_, key_), [])
+                if n_ == len(same_key):
+                    same_key.append(len(self.tracks))
+                    self.tracks.append(AssetTrack(len(self.tracks), kind_, key_))
+                track = self.tracks[same_key[n_]]
+                track.appearances.append(index)
+                track.assets.append(asset_)
+                track.values.append(asset_kind.value(asset_))
+                track.owners.append(asset_kind.owners(asset_))
+                track_ids.append(track.asset_id)
+            self._keys[kind_].append(keys)
+            self._track_ids[kind_].append(track_ids)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.declarations)
+
+    def index_of(self, declaration) -> int:
+        return self._index_by_id[declaration.declaration_id]
+
+    def get_tracks(self, kind: str) -> list[AssetTrack]:
+        return [track_ for track_ in self.tracks if track_.kind == kind]
+
+    # tracks of the assets of a declaration, in declaration order
+    def tracks_of(self, kind: str, declaration) -> list[AssetTrack]:
+        return [self.tracks[id_] for id_ in self._track_ids[kind][self.index_of(declaration)]]
+
+    # assets of prev_decl vs curr_decl (both already added; may be the same declaration)
+    def diff(self, kind: str, prev_decl, curr_decl) -> AssetDiff:
+        attribute = ASSET_KINDS[kind].attribute
+        return AssetDiff(getattr(prev_decl, attribute), getattr(curr_decl, attribute),
+                         self._keys[kind][self.index_of(prev_decl)], self._keys[kind][self.index_of(curr_decl)])
+
+    # assets of curr_decl that prev_decl does not have, but some declaration before prev_decl had:
+    # [(track, asset as declared in curr_decl, index of the last declaration before curr_decl where it was declared)]
+    def reappeared(self, kind: str, prev_decl, curr_decl) -> list[tuple[AssetTrack, object, int]]:
+        prev_index, curr_index = self.index_of(prev_decl), self.index_of(curr_decl)
+        prev_ids = set(self._track_ids[kind][prev_index])
+        result = []
+        for id_ in self._track_ids[kind][curr_index]:
+            track = self.tracks[id_]
+            if id_ in prev_ids or track.first_seen >= prev_index:
+                continue
+            result.append((track, track.asset_at(curr_index), track.seen_before(prev_index)))
+        return result
+    # --- class AssetTimeline end ---
@@ -1,15 +1,23 @@
+from dataclasses import dataclass
 
-#TODO rewrite as dataclass
+from .interning import intern_value
+
+
+# slotted and frozen - a corpus run holds millions of entities
+# equality and hash are defined below (same brand, model and manufacture year), so the generated ones are not used
+@dataclass(slots=True, frozen=True, eq=False)
 class Vehicle:
-    def __init__(self, vehicle_type: str, brand: str, model: str, manufacture_year: str|int,
-                 acquire_date: str, owners: dict[int: str], cost: str|int):
-        self.vehicle_type: str = vehicle_type.lower()
-        self.brand: str = brand
-        self.model: str = model
-        self.manufacture_year: int = _get_year(manufacture_year)
-        self.acquire_date: str = acquire_date
-        self.owners: dict[int: str] = owners
-        self.cost: int|str = cost
+    vehicle_type: str
+    brand: str
+    model: str
+    manufacture_year: int
+    acquire_date: str
+    owners: dict[int: str]
+    cost: int|str
+
+    def __post_init__(self):
+        object.__setattr__(self, 'vehicle_type', intern_value(self.vehicle_type.lower()))
+        object.__setattr__(self, 'manufacture_year', _get_year(self.manufacture_year))
 
     def get_acquire_year(self) -> int:
         if len(self.acquire_date) == 4 and self.acquire_date.isdecimal():
@@ -44,6 +52,14 @@ class Vehicle:
                 and self.brand.lower() == other.brand.lower()
                 and self.manufacture_year == other.manufacture_year )
 
+    # what __eq__ compares, as one hashable value - equal vehicles have equal keys
+    @property
+    def identity_key(self) -> tuple[str, str, int]:
+        return self.brand.lower(), self.model.lower(), self.manufacture_year
+
+    def __hash__(self):
+        return hash(self.identity_key)
+
     def __str__(self):
         if self.cost:
             price_str = f'{self.cost} грн'
@@ -97,8 +113,8 @@ def get_vehicle_entries(step6_data: list[dict]) -> list[Vehicle]:
             # для випадків типу оренди - тоді ключ - той, хто використовує/розпоряджається згідно декларації
             owners = {entry_['rights'][0]['rightBelongs'] : '0'}
         cost_parsed = _parse_cost(entry_['costDate'])
-        vehicle_ = Vehicle(entry_['objectType'], entry_['brand'], entry_['model'], entry_['graduationYear'],
-                           entry_['owningDate'], owners, cost_parsed)
+        vehicle_ = Vehicle(entry_['objectType'], intern_value(entry_['brand']), entry_['model'],
+                           entry_['graduationYear'], entry_['owningDate'], owners, cost_parsed)
         vehicle_list.append(vehicle_)
     return vehicle_list
 
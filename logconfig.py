@@ -0,0 +1,15 @@
+import logging
+
+import settings
+
+# Logging setup for command line entry points (main.py, batch.py and its workers, nazkTools run_* functions).
+# Modules never configure logging on import, so a program that imports them keeps its own setup.
+
+
+# level - name ('DEBUG', 'INFO'...) or number, settings.LOG_LEVEL by default
+def configure_logging(level: str|int = None):
+    level = level or settings.LOG_LEVEL
+    logging.basicConfig(format='{asctime} [{levelname}] {message}',
+                        style='{',
+                        datefmt="%H:%M", # datefmt="%Y-%m-%d %H:%M",
+                        level=level.upper() if isinstance(level, str) else level)
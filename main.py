@@ -1,12 +1,132 @@
-from examples import *
+# Command line entry point.
+# usage (from repository root):
+#   python main.py fetch 'НЕБИЛИЦЯ Ольга Дмитрівна'
+#   python main.py analyze 'НЕБИЛИЦЯ Ольга Дмитрівна' --declarant-id 123
+#   python main.py render 'НЕБИЛИЦЯ Ольга Дмитрівна'
+#   python main.py batch names.txt --workers 4
+#   python main.py bench replay --synthetic 20
+# Only argparse is imported up front: nazkTools (requests, numpy, python-docx, all parsers) and the other
+# heavy modules are imported by the subcommand that needs them, so --help and --version return at once.
+# See benchmarks/bench_importtime.py for import times of the modules.
+import argparse
+import sys
 
-# def test_examples():
-#     try_socket()
-    # try_urllib3()
-    # try_lxml()
-    # try_requests_image()
-    # try_beautiful_soup2()
+__version__ = '0.1.0'
+
+BENCHMARKS = ('entities', 'importtime', 'json_decode', 'logging', 'parse_memory', 'replay')
+
+
+# ------ Subcommands ------
+
+# prints the declarations of a person that check_person would compare, loading each of them
+def run_fetch(args) -> int:
+    import nazkTools
+    declarations = list(nazkTools.iter_declaration_cards(args.full_name))
+    if not nazkTools.check_for_namesakes(declarations):
+        print('Several persons with this full name found, run again with --declarant-id', file=sys.stderr)
+        return 2
+    if args.declarant_id:
+        declarations = nazkTools.filter_namesakes_for_id(declarations, args.declarant_id)
+    major_declarations = nazkTools.get_sorted_major_declarations(declarations)
+    major_declarations = nazkTools.remove_incorrect_declarations(major_declarations)
+    loaded, failed = nazkTools.load_full_declarations(major_declarations, args.workers)
+    failed_ids = {decl_.declaration_id for decl_ in failed}
+    for decl_ in major_declarations:
+        status = 'not loaded' if decl_.declaration_id in failed_ids else 'loaded'
+        print(f'{decl_.year}\t{decl_.written_type}\t{decl_.declaration_id}\t{status}')
+    print(f'{len(loaded)} of {len(major_declarations)} declarations loaded')
+    return 1 if failed else 0
+
+
+def run_analyze(args) -> int:
+    report = _check_person(args)
+    if report is None:
+        return 2
+    print(report)
+    if args.docx:
+        report.print_to_docx()
+    return 0
+
+
+def run_render(args) -> int:
+    report = _check_person(args)
+    if report is None:
+        return 2
+    report.print_to_docx()
+    print(f'doc_reports/{report.full_name}.docx')
+    return 0
+
+
+def run_batch(args) -> int:
+    import batch
+    return batch.main(args.batch_args)
+
+
+# benchmarks are modules run as scripts - each one reads its own arguments from sys.argv
+def run_bench(args) -> int:
+    import runpy
+    module = f'benchmarks.bench_{args.name}'
+    sys.argv = [module] + args.bench_args
+    runpy.run_module(module, run_name='__main__', alter_sys=True)
+    return 0
+
+
+# report of check_person, None if the name has namesakes and no declarant_id was given
+def _check_person(args):
+    import nazkTools
+    try:
+        return nazkTools.check_person(args.full_name, args.declarant_id, args.workers)
+    except BaseException as e:
+        if type(e) is not BaseException: # errors, KeyboardInterrupt, SystemExit
+            raise
+        # check_person raises bare BaseException when it finds namesakes
+        print('Several persons with this full name found, run again with --declarant-id', file=sys.stderr)
+        return None
+
+
+# ------ Arguments ------
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='main.py', description='Analysis of NAZK declarations')
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    parser.add_argument('--log-level', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'), type=str.upper,
+                        help='settings.LOG_LEVEL (NAZK_LOG_LEVEL) by default')
+    commands = parser.add_subparsers(dest='command', required=True, metavar='command')
+
+    person = argparse.ArgumentParser(add_help=False)
+    person.add_argument('full_name', help="full name as declared, e.g. 'НЕБИЛИЦЯ Ольга Дмитрівна'")
+    person.add_argument('--declarant-id', type=int, default=0, help='needed if the name has namesakes')
+    person.add_argument('--workers', type=int, help='declarations loaded in parallel (settings.LOAD_WORKERS)')
+
+    fetch = commands.add_parser('fetch', parents=[person], help='load declarations of a person and list them')
+    fetch.set_defaults(run=run_fetch)
+    analyze = commands.add_parser('analyze', parents=[person], help='check a person and print the report')
+    analyze.add_argument('--docx', action='store_true', help='also write the report to doc_reports/')
+    analyze.set_defaults(run=run_analyze)
+    render = commands.add_parser('render', parents=[person], help='check a person and write the docx report')
+    render.set_defaults(run=run_render)
+    # batch and bench pass all their arguments, --help included, on to the module they run
+    # (with no '-' prefix chars every argument is positional)
+    batch = commands.add_parser('batch', help='check every person from a names file (see batch.py)',
+                                add_help=False, prefix_chars='+')
+    batch.add_argument('batch_args', nargs=argparse.REMAINDER, help='arguments of batch.py')
+    batch.set_defaults(run=run_batch)
+    bench = commands.add_parser('bench', help='run a benchmark (see benchmarks/)', add_help=False, prefix_chars='+')
+    bench.add_argument('name', choices=BENCHMARKS)
+    bench.add_argument('bench_args', nargs=argparse.REMAINDER, help='arguments of the benchmark')
+    bench.set_defaults(run=run_bench)
+    return parser
+
+
+def main(argv: list[str] = None) -> int:
+    args = get_parser().parse_args(argv)
+    import settings
+    from logconfig import configure_logging
+    if args.log_level:
+        settings.LOG_LEVEL = args.log_level # batch workers get it with the rest of settings
+    configure_logging()
+    return args.run(args)
 
 
 if __name__ == '__main__':
-    x=1
+    sys.exit(main())
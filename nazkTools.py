@@ -1,38 +1,64 @@
-from collections import defaultdict
-
-import requests
-import json
-
-import reports
+from collections import defaultdict, deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import cache
+
+import hashlib
+import math
+import inspect
+import io
+import pickle
+import zlib
+
+import settings
+from logconfig import configure_logging
+from api import jsondecode
+from api import ShardedStore, SingleFlight, get_client, get_document_cache, get_parsed_cache, get_search_cache
+from entities.assets import AssetDiff
 from entities.declaration import *
 from entities.earnings import *
+from entities.intervals import SavingsChangeRange, SavingsChangeRanges
 from entities.savings import *
 from entities.person import *
 from entities.property import *
+from entities.steps import STEP_PARSERS
+from entities.timeline import AssetTimeline, AssetTrack
 from entities.vehicle import get_vehicle_entries
 from reports import *
+from reports.general_report import GeneralReport
+
+import logging
 
-import logging as log
+# after the star imports - they bring in the `log` of entities modules
+log = logging.getLogger(__name__)
+# nothing is printed unless the program configures logging (logconfig.configure_logging)
+log.addHandler(logging.NullHandler())
 
-LIST_ADDRESS = 'https://public-api.nazk.gov.ua/v2/documents/list?query='
+# API addresses are built from settings.API_BASE_URL, so the tool can be pointed at a local stand-in (api.standin)
+LIST_PATH = '/v2/documents/list?query='
 
-DOC_ADDRESS = 'https://public-api.nazk.gov.ua/v2/documents/'
+DOC_PATH = '/v2/documents/'
 
 REGULAR_DECL_VIEW_ADDRESS = 'https://public.nazk.gov.ua/documents/'
 
-log.basicConfig(format='{asctime} [{levelname}] {message}',
-                style='{',
-                datefmt="%H:%M", # datefmt="%Y-%m-%d %H:%M",
-                # level=log.DEBUG)
-                # level=log.INFO)
-                # level=log.WARNING)
-                level=log.ERROR)
+# declaration steps used by run_comparison - parsed while declarations are loaded in check_person
+# 2 - persons, 3 - real estate, 6 - vehicles, 11 - earnings, 12 - savings
+ANALYSIS_STEPS = (2, 3, 6, 11, 12)
 
-report = reports.init_new_report()
+# part of the parsed declarations cache key - bump it to drop cached declarations manually
+# (not needed for changes in parser code - those are detected automatically, see get_parser_version())
+PARSER_VERSION = 1
 
 # --------------------------
 
 # --- Utils ----------------
+def get_list_address() -> str:
+    return settings.API_BASE_URL.rstrip('/') + LIST_PATH
+
+def get_doc_address() -> str:
+    return settings.API_BASE_URL.rstrip('/') + DOC_PATH
+
 def unify_name(full_name) -> str:
     return '+'.join(full_name.casefold().split())
 
@@ -60,15 +86,63 @@ def remove_incorrect_declarations(declarations) -> list[Declaration]:
 # --------------------------
 
 # --- Loading\parsing ------
+# concurrent requests for the same url share one fetch (see get_json_cached)
+_in_flight = SingleFlight()
+
+
+# returns parsed json from url, response body is taken from (and saved to) cache if it's enabled
+# only responses that are valid json are cached
+# concurrent callers asking for the same url wait for the first one and get the same (shared) parsed object,
+# so the result must not be modified
+def get_json_cached(url: str, cache: ShardedStore|None, key: str) -> dict:
+    return _in_flight.do(url, lambda: _get_json_cached(url, cache, key))
+
+
+def _get_json_cached(url: str, cache: ShardedStore|None, key: str) -> dict:
+    raw = cache.get(key) if cache is not None else None
+    if raw is not None:
+        log.debug('Cache hit for %s', key)
+        return jsondecode.loads(raw)
+    raw = get_client().get(url).content
+    data = jsondecode.loads(raw)
+    if cache is not None:
+        cache.put(key, raw)
+    return data
+
+
+# yields pages of search results (documents/list) for the name, one request per page
+# follows pagination until all found declarations are received; stop iterating to skip remaining pages
+def iter_search_pages(full_name) -> Iterator[dict[str, object]]:
+    received = 0
+    page_ = 1
+    while True:
+        url = get_list_address() + unify_name(full_name) + f'&page={page_}'
+        log.debug('Requesting declarations list, page %d: %s', page_, url)
+        data = get_json_cached(url, get_search_cache(), url)
+        items = data.get('data') or []
+        if page_ == 1:
+            log.info('declarations found: %s', data.get('count'))
+        yield data
+        received += len(items)
+        # 'count' is the total number of declarations found, not the number of items on this page
+        if not items or received >= int(data.get('count') or 0) or page_ >= settings.SEARCH_MAX_PAGES:
+            break
+        page_ += 1
+
+
+# yields Declaration cards for all declarations found for the name, page by page as they arrive
+def iter_declaration_cards(full_name) -> Iterator[Declaration]:
+    for data in iter_search_pages(full_name):
+        yield from parse_declaration_cards(data)
+
+
+# returns json with all declarations found for this name (all pages merged into one 'data' list)
+# prefer iter_declaration_cards() - this one keeps every page in memory
 def get_all_declarations_by_name(full_name) -> dict[str, object]:
-    url = LIST_ADDRESS + unify_name(full_name)
-    print(url)
-    response = requests.get(url)
-    # print(response.text)
-
-    data = json.loads(response.text)
-    log.info('declarations found: ' + str(data['count']))
-    # returns json with all declarations found for this name
+    data = {'count': 0, 'data': []}
+    for page_data in iter_search_pages(full_name):
+        data['count'] = page_data.get('count', 0)
+        data['data'].extend(page_data.get('data') or [])
     return data
 
 
@@ -102,195 +176,274 @@ def filter_namesakes_for_id(declarations: list[Declaration], declarant_id: int)
     return [decl for decl in declarations if decl.declarant_id == declarant_id]
 
 
-# loads full info about declaration from respective page
-# returns the same object that was passed as parameter
-def load_full_declaration(declaration) -> Declaration:
-    url = DOC_ADDRESS + declaration.declaration_id
-    log.debug(f'Loading full declaration, request address: {url}')
+# stamp for the parsed declarations cache: PARSER_VERSION + hash of the source code of every step parser,
+# of every module whose objects end up in the pickled declaration state (ledgers, interned values, amounts
+# converted by exchange rates) and of load_full_declaration itself, so any change to parsing or to the layout
+# of cached objects makes old cache entries unreachable
+@cache
+def get_parser_version() -> str:
+    import entities.declaration, entities.earnings, entities.interning, entities.ledger, entities.person
+    import entities.property, entities.rates, entities.savings, entities.steps, entities.vehicle
+    hash_ = hashlib.sha1(str(PARSER_VERSION).encode())
+    for source_ in (entities.declaration, entities.earnings, entities.interning, entities.ledger, entities.person,
+                    entities.property, entities.rates, entities.savings, entities.steps, entities.vehicle,
+                    load_full_declaration):
+        hash_.update(inspect.getsource(source_).encode())
+    return hash_.hexdigest()[:16]
+
+
+def _get_parsed_cache_key(declaration: Declaration) -> str:
+    return f'{declaration.declaration_id}:{get_parser_version()}'
+
+
+# restores parsed details (persons, property, vehicles, earnings, savings and their splits) from cache
+# into declaration card; returns False if there is no entry for current parser version
+def load_parsed_declaration(declaration: Declaration, cache: ShardedStore) -> bool:
+    raw = cache.get(_get_parsed_cache_key(declaration))
+    if raw is None:
+        return False
+    try:
+        state = pickle.loads(zlib.decompress(raw))
+    except Exception:
+        log.warning('Corrupted parsed cache entry for declaration %s, ignored', declaration.declaration_id)
+        return False
+    declaration.__dict__.update(state)
+    return True
+
+
+# raw document is not saved - it's kept in the document cache
+def save_parsed_declaration(declaration: Declaration, cache: ShardedStore):
+    state = {k: v for k, v in declaration.__dict__.items() if k not in ('_document', '_compressed_document')}
+    cache.put(_get_parsed_cache_key(declaration),
+              zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)))
+
+
+# returns raw full document for declaration ('data' of the response), from document cache or from the API
+def get_declaration_document(declaration: Declaration) -> dict:
+    url = get_doc_address() + declaration.declaration_id
+    log.debug('Loading full declaration, request address: %s', url)
     # print(url)
-    response = requests.get(url)
-    data = json.loads(response.text)
-    log.debug(f'Declaration {declaration.written_type} for {declaration.year} loaded, jsonified response: \n  {data}')
-
-    log.debug('Parsing loaded declaration')
-    declaration.full_name = (  data['data']['step_1']['data']['lastname'] + ' '
-                             + data['data']['step_1']['data']['firstname'] + ' '
-                             + data['data']['step_1']['data']['middlename'])
-
-    for i_ in range(2, 17):
-        if (('isNotApplicable' in data['data']['step_' + str(i_)])
-                and (str(data['data']['step_' + str(i_)]['isNotApplicable']) == '1' )):
-            log.info(f'Step {i_} missed, isNotApplicable is true for this step')
-            if i_ == 2:
-                log.warning(f'No persons found in declaration {declaration.declaration_id}')
-                # report.add_record(ReportLevel.STEP, 'No family members declared in this declaration')
-            if i_ == 3:
-                log.warning(f'No real estate property found in declaration {declaration.declaration_id}')
-            if i_ == 6:
-                log.warning(f'No vehicles found in declaration {declaration.declaration_id}')
-            if i_ == 11:
-                log.warning(f'Earnings not found in declaration {declaration.declaration_id}')
-                # report.add_record(ReportLevel.STEP, 'No earnings declared in this declaration', critical=3)
-            if i_ == 12:
-                log.warning(f'Savings not found in declaration {declaration.declaration_id}')
-                # report.add_record(ReportLevel.STEP, 'No savings declared in this declaration', critical=3)
-            continue
-        if 'data' in data['data']['step_' + str(i_)]:
-            log.debug(f'data found for step {i_}')
-            declaration.data['step_' + str(i_)] = data['data']['step_' + str(i_)]['data']
-            if i_ == 2: # Члени сім'ї та пов'язані особи
-                try:
-                    declaration.persons = get_person_entries(data['data']['step_' + str(i_)]['data'])
-                    log.debug('related persons loaded')
-                except KeyError:
-                    log.error(f'KeyException caught in declaration {declaration.declaration_id}, year: {declaration.year}, '
-                              f'while loading full declaration, step 2')
-                    log.exception('')
-                # add main figure to the list of related persons - to resolve references in property and savings/earnings
-                try:
-                    declaration.persons['1'] = get_self_entry(data['data']['step_1']['data'])
-                    log.debug('key figure added as a person with id: 1, relation type: self')
-                except KeyError:
-                    log.error(f'KeyException caught in declaration {declaration.declaration_id}, year: {declaration.year}, '
-                              f'while loading full declaration, step 2')
-                    log.exception('')
-            if i_ == 3:  # Нерухомість
-                try:
-                    declaration.property_list = get_property_entries(data['data']['step_' + str(i_)]['data'])
-                except KeyError:
-                    log.error(f'KeyException caught in declaration {declaration.declaration_id}, year: {declaration.year}, '
-                              f'while loading full declaration, step 3')
-                    log.exception('')
-                except BaseException as e:
-                    log.error(f'BaseException caught in declaration {declaration.declaration_id}, year: {declaration.year}, '
-                              f'while loading full declaration, step 3')
-                    log.exception(e)
-            if i_ == 6:  # Рухоме майно (транспортні засоби)
-                try:
-                    declaration.vehicle_list = get_vehicle_entries(data['data']['step_' + str(i_)]['data'])
-                except KeyError:
-                    log.error(
-                        f'KeyException caught in declaration {declaration.declaration_id}, year: {declaration.year}, '
-                        f'while loading full declaration, step 6')
-                    log.exception('')
-                except BaseException as e:
-                    log.error(
-                        f'BaseException caught in declaration {declaration.declaration_id}, year: {declaration.year}, '
-                        f'while loading full declaration, step 6')
-                    log.exception(e)
-            if i_ == 11:  # Доходи, у тому числі подарунки
-                declaration.earnings = get_earnings_entries(data['data']['step_' + str(i_)]['data'])
-                log.debug('earnings loaded')
-                declaration.earnings_by_person = sum_taxed_and_split_by_person(declaration.earnings)
-                log.debug('earnings taxed and split by person')
-            if i_ == 12:  # Грошові активи
-                declaration.savings = get_savings_entries(data['data']['step_' + str(i_)]['data'])
-                log.debug('savings loaded')
-                # TODO line below works incorrectly, needs to be rewritten
-                # declaration.savings_by_person = convert_and_split_by_person_v1(declaration.savings, declaration.year)
-                declaration.savings_by_prsn_and_curr = split_by_person_avg(declaration.savings)
-                declaration.savings_by_currency = sum_savings_by_currency_avg(declaration.savings)
-                log.debug('savings split by person')
+    data = get_json_cached(url, get_document_cache(), declaration.declaration_id)
+    # the whole document is printed - only when asked for
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug('Declaration %s for %s loaded, jsonified response: \n  %s', declaration.written_type, declaration.year, data)
+    return data['data']
+
+
+# lets declarations restored from the parsed cache parse remaining steps on demand
+Declaration.document_loader = get_declaration_document
+
+
+# parses given steps of the declaration with the streaming parser, straight from the document cache file
+# or from the response body - the full document is never decoded; raw step_1 is kept and returned
+# a fetched body goes to the document cache only after it was read to the end, i.e. it is valid json
+def parse_declaration_stream(declaration: Declaration, steps: Iterable[int]) -> dict:
+    cache = get_document_cache()
+    stream = cache.open(declaration.declaration_id) if cache is not None else None
+    raw = None
+    if stream is None:
+        url = get_doc_address() + declaration.declaration_id
+        log.debug('Loading full declaration for streaming parse, request address: %s', url)
+        raw = _in_flight.do('raw:' + url, lambda: get_client().get(url).content)
+        stream = io.BytesIO(raw)
+    with stream:
+        items = jsondecode.iter_object_items(stream, 'data', STEP_PARSERS.get_required_keys(steps) | {'step_1'})
+        raw_steps = declaration.parse_step_items(items, steps, keep=('step_1',))
+    if raw is not None and cache is not None:
+        cache.put(declaration.declaration_id, raw)
+    return raw_steps
+
+
+# full name of the declarant from step 1 of the raw document
+def get_full_name(document: dict) -> str:
+    return (  document['step_1']['data']['lastname'] + ' '
+            + document['step_1']['data']['firstname'] + ' '
+            + document['step_1']['data']['middlename'])
+
 
+# loads full info about declaration from respective page
+# steps - declaration steps to parse right away (e.g. ANALYSIS_STEPS); all other steps are parsed
+#   only when respective attributes of the declaration are accessed
+# retention - what to do with the raw document after that, see RAW_RETENTION_POLICIES
+#   (settings.RAW_RETENTION by default); the streaming parser never keeps it
+# returns the same object that was passed as parameter
+def load_full_declaration(declaration, steps: Iterable[int] = (), retention: str = None) -> Declaration:
+    steps = tuple(steps)
+    retention = retention or settings.RAW_RETENTION
+    parsed_cache = get_parsed_cache()
+    if parsed_cache is not None and load_parsed_declaration(declaration, parsed_cache):
+        log.debug('Declaration %s loaded from parsed declarations cache', declaration.declaration_id)
+        if all(declaration.is_step_parsed(step_) for step_ in steps):
+            declaration.release_document(retention)
+            return declaration
+    elif settings.STREAMING_PARSE and jsondecode.STREAMING_AVAILABLE:
+        document = parse_declaration_stream(declaration, steps)
+        declaration.full_name = get_full_name(document)
+    else:
+        document = get_declaration_document(declaration)
+        log.debug('Parsing loaded declaration')
+        declaration.full_name = get_full_name(document)
+        declaration.set_document(document)
+
+    declaration.parse_steps(steps)
+    declaration.release_document(retention)
+    if parsed_cache is not None:
+        save_parsed_declaration(declaration, parsed_cache)
     return declaration
 
+
+# loads full info for several declarations in parallel, at most `workers` documents at a time
+# returns loaded declarations in the same order they were passed, and a list of those that failed to load
+# (a failure in one document does not affect the others)
+# raw documents are dropped after parsing unless retention says otherwise (settings.BATCH_RAW_RETENTION)
+def load_full_declarations(declarations: list[Declaration], workers: int = None, steps: Iterable[int] = ANALYSIS_STEPS,
+                           retention: str = None) -> tuple[list[Declaration], list[Declaration]]:
+    loaded: list[Declaration] = []
+    failed: list[Declaration] = []
+    for decl_, is_loaded_ in iter_full_declarations(declarations, workers, steps, retention, window=len(declarations)):
+        (loaded if is_loaded_ else failed).append(decl_)
+    return loaded, failed
+
+
+# loads declarations like load_full_declarations, but yields (declaration, True if loaded) for each of them
+# in the order they were passed, as soon as it is done - the caller works on it while the next ones are loading
+# at most `window` declarations (settings.LOAD_WINDOW) are loading or loaded but not yet taken by the caller
+def iter_full_declarations(declarations: Iterable[Declaration], workers: int = None,
+                           steps: Iterable[int] = ANALYSIS_STEPS, retention: str = None,
+                           window: int = None) -> Iterator[tuple[Declaration, bool]]:
+    workers = workers or settings.LOAD_WORKERS
+    retention = retention or settings.BATCH_RAW_RETENTION
+    window = max(1, window or settings.LOAD_WINDOW)
+    steps = tuple(steps)
+    declarations = iter(declarations)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending: deque = deque()
+
+        def submit_next():
+            decl_ = next(declarations, None)
+            if decl_ is not None:
+                pending.append((decl_, executor.submit(load_full_declaration, decl_, steps, retention)))
+
+        for _ in range(window):
+            submit_next()
+        while pending:
+            decl_, future_ = pending.popleft()
+            try:
+                future_.result()
+                is_loaded = True
+            except Exception:
+                log.error('Could not load declaration %s, year: %s', decl_.declaration_id, decl_.year)
+                log.exception('')
+                is_loaded = False
+            submit_next()
+            yield decl_, is_loaded
+
 # ----------------------------
 
 # --- Comparison functions ---
 #compares two full declarations
-def run_comparison(prev_decl: Declaration, curr_decl: Declaration):
-    report.add_record(ReportLevel.TOP,
+# context - report to write to and what was computed for the whole timeline of the declarant
+def run_comparison(context: 'AnalysisContext', prev_decl: Declaration, curr_decl: Declaration):
+    savings_range = context.get_savings_range(curr_decl)
+    context.report.add_record(ReportLevel.TOP,
                       f'Декларація {curr_decl.written_type} за {curr_decl.year} рік.',
                       hyperlink=f'{REGULAR_DECL_VIEW_ADDRESS+curr_decl.declaration_id}')
-    log.debug(f'Report row added: Declaration {curr_decl.written_type}, year {curr_decl.year}')
+    log.debug('Report row added: Declaration %s, year %s', curr_decl.written_type, curr_decl.year)
 
     # TODO rewrite every report entry and output - add checks for declaration being first to report
     if prev_decl == curr_decl:
-        report.add_record(ReportLevel.STEP,
+        context.report.add_record(ReportLevel.STEP,
                           f'Перша декларація - ігноруйте повідомлення про зміни, буде виправлено у наступних версіях')
 
     # compare property - step 3
-    report.add_record(ReportLevel.STEP, 'Нерухомість: ')
+    context.report.add_record(ReportLevel.STEP, 'Нерухомість: ')
     if not bool(curr_decl.property_list):
-        report.add_record(ReportLevel.SUBSTEP, 'Не задекларовано жодного об\'єкта нерухомості', critical=2)
-    compare_property_list(prev_decl, curr_decl) # if curr is emtpy, reports removed if any
+        context.report.add_record(ReportLevel.SUBSTEP, 'Не задекларовано жодного об\'єкта нерухомості', critical=2)
+    compare_property_list(context, prev_decl, curr_decl) # if curr is emtpy, reports removed if any
 
     # compare cars - step 6
-    report.add_record(ReportLevel.STEP, 'Рухоме майно (транспортні засоби): ')
+    context.report.add_record(ReportLevel.STEP, 'Рухоме майно (транспортні засоби): ')
     if not bool(curr_decl.vehicle_list):
-        report.add_record(ReportLevel.SUBSTEP, 'Не задекларовано жодного об\'єкта рухомого майна')
-    compare_vehicle_list(prev_decl, curr_decl) # should it be here or in the else block above?
+        context.report.add_record(ReportLevel.SUBSTEP, 'Не задекларовано жодного об\'єкта рухомого майна')
+    compare_vehicle_list(context, prev_decl, curr_decl) # should it be here or in the else block above?
 
     # compare earnings - step 11
-    report.add_record(ReportLevel.STEP, 'Доходи: ')
+    context.report.add_record(ReportLevel.STEP, 'Доходи: ')
     if not bool(curr_decl.earnings_by_person):
-        report.add_record(ReportLevel.SUBSTEP, 'Не задекларовано жодних доходів', critical=3)
+        context.report.add_record(ReportLevel.SUBSTEP, 'Не задекларовано жодних доходів', critical=3)
         total_income_taxed = 0
     else:
         total_income = sum([entry_.amount for entry_ in curr_decl.earnings])
-        report.add_record(ReportLevel.SUBSTEP, f'Загальний задекларований дохід:')
-        report.add_record(ReportLevel.DETAILS, f' {total_income} грн')
+        context.report.add_record(ReportLevel.SUBSTEP, f'Загальний задекларований дохід:')
+        context.report.add_record(ReportLevel.DETAILS, f' {total_income} грн')
         total_income_taxed = sum([entry_.amount_taxed for entry_ in curr_decl.earnings])
-        report.add_record(ReportLevel.SUBSTEP,
+        context.report.add_record(ReportLevel.SUBSTEP,
                           f'Загальний задекларований дохід після вирахування податків '
                           f'(податки вирахувані лише із відповідних категорій доходів): ')
-        report.add_record(ReportLevel.DETAILS, f' {total_income_taxed} грн')
+        context.report.add_record(ReportLevel.DETAILS, f' {total_income_taxed} грн')
 
     # compare savings - step 12
     if not bool(curr_decl.savings_by_currency): # fool check
         curr_decl.savings_by_currency = sum_savings_by_currency_avg(curr_decl.savings)
-    report.add_record(ReportLevel.STEP, 'Грошові активи: ')
+    context.report.add_record(ReportLevel.STEP, 'Грошові активи: ')
     if not bool(curr_decl.savings_by_currency):
-        report.add_record(ReportLevel.SUBSTEP, 'Не задекларовано жодних грошових активів', critical=3)
-        get_savings_diff_by_person_v2(prev_decl, curr_decl) # to print all those who were in previous declaration, but aren't present here
+        context.report.add_record(ReportLevel.SUBSTEP, 'Не задекларовано жодних грошових активів', critical=3)
+        get_savings_diff_by_person_v2(context, prev_decl, curr_decl) # to print all those who were in previous declaration, but aren't present here
     else:
-        log.debug(curr_decl.savings_by_currency)
+        log.debug('%s', curr_decl.savings_by_currency)
         # code below is deprecated, rewrite if ratio for savings/income by person is needed
-        # savings_diff_by_person_ = get_savings_diff_by_person_v1(prev_decl, curr_decl)
+        # savings_diff_by_person_ = get_savings_diff_by_person_v1(context, prev_decl, curr_decl)
         # percentage_by_person_ = get_savings_percentage_by_person(prev_decl.earnings_by_person, savings_diff_by_person_)
         # for person_, percentage_ in percentage_by_person_.items():
         #     log.debug(f'Percentage of accumulated savings by person between following declarations: '
         #                 f'\'{prev_decl.written_type}\' for {prev_decl.year} '
         #                 f'and \'{curr_decl.written_type}\' for {curr_decl.year} : '
         #                 f'\n {person_} - {percentage_}')
-        #     report.add_record(ReportLevel.SUBSTEP,
+        #     context.report.add_record(ReportLevel.SUBSTEP,
         #                       f'Особа {curr_decl.get_person_name_by_id(person_)} - приріст грошових активів '
         #                       f'склав близько {percentage_:.0%} від задекларованих доходів за цей рік',
         #                       critical=1)
 
         # to print all those who were in previous declaration, but aren't present here
         # without using returned value
-        get_savings_diff_by_person_v2(prev_decl, curr_decl)
+        get_savings_diff_by_person_v2(context, prev_decl, curr_decl)
 
-        report.add_record(ReportLevel.SUBSTEP, f'Загальний стан задекларованих рахунків: ')
-        report.add_record(
+        context.report.add_record(ReportLevel.SUBSTEP, f'Загальний стан задекларованих рахунків: ')
+        context.report.add_record(
             ReportLevel.DETAILS,
             ';  '.join("{}: {}".format(k, v) for k, v in dict(sorted(curr_decl.savings_by_currency.items())).items()))
         savings_diff = get_savings_diff_by_avg(prev_decl,curr_decl)
         diff_total = get_total_converted_avg(savings_diff, curr_decl.year)
         if diff_total != 0: # if there were any changes
-            report.add_record(ReportLevel.SUBSTEP, f'Зміни з попередньої декларації: ')
-            report.add_record(
+            context.report.add_record(ReportLevel.SUBSTEP, f'Зміни з попередньої декларації: ')
+            context.report.add_record(
                 ReportLevel.DETAILS,
                 ';  '.join("{}: {}".format(k, v) for k, v in dict(sorted(savings_diff.items())).items()))
             sign_ = '+' if diff_total >= 0 else ''
-            report.add_record(ReportLevel.SUBSTEP, f'Сума змін на всіх грошових рахунках (у гривневому еквіваленті, за середньорічним курсом): ')
-            report.add_record(ReportLevel.DETAILS, f' {sign_}{diff_total} ')
-            # TODO add total diff in range
+            context.report.add_record(ReportLevel.SUBSTEP, f'Сума змін на всіх грошових рахунках (у гривневому еквіваленті, за середньорічним курсом): ')
+            context.report.add_record(ReportLevel.DETAILS, f' {sign_}{diff_total} ')
+            if savings_range is not None and savings_range.low != savings_range.high:
+                context.report.add_record(ReportLevel.SUBSTEP, f'Сума змін на всіх грошових рахунках з урахуванням коливань курсу протягом року (від мінімального до максимального курсу): ')
+                context.report.add_record(ReportLevel.DETAILS, f' від {math.floor(savings_range.low):+d} до {math.ceil(savings_range.high):+d} ')
             if total_income_taxed and total_income_taxed != 0:
                 ratio_avg = diff_total / total_income_taxed
-                report.add_record(ReportLevel.SUBSTEP, f'Сума змін на всіх грошових рахунках склала близько {ratio_avg:.0%} від задекларованих доходів (після вирахування податків)')
+                context.report.add_record(ReportLevel.SUBSTEP, f'Сума змін на всіх грошових рахунках склала близько {ratio_avg:.0%} від задекларованих доходів (після вирахування податків)')
+                if savings_range is not None and savings_range.ratio_low is not None:
+                    if savings_range.ratio_low != savings_range.ratio_high:
+                        context.report.add_record(ReportLevel.SUBSTEP, f'З урахуванням коливань курсу - від {savings_range.ratio_low:.0%} до {savings_range.ratio_high:.0%} від задекларованих доходів (після вирахування податків)')
+                    if savings_range.exceeds_income():
+                        context.report.add_record(ReportLevel.SUBSTEP, f'Приріст грошових активів перевищує задекларовані доходи (після вирахування податків) навіть за найвигіднішим для декларанта курсом валют', critical=3)
             elif diff_total > 0:
-                report.add_record(ReportLevel.SUBSTEP, f'Сума змін на рахунках склала {sign_}{diff_total}, але жодних доходів не було задекларовано', critical=3)
+                context.report.add_record(ReportLevel.SUBSTEP, f'Сума змін на рахунках склала {sign_}{diff_total}, але жодних доходів не було задекларовано', critical=3)
         else:
-            report.add_record(ReportLevel.SUBSTEP, f'Змін у задекларованих рахунках не зафіксовано (перерозподіл коштів між членами родини ігнорується)')
+            context.report.add_record(ReportLevel.SUBSTEP, f'Змін у задекларованих рахунках не зафіксовано (перерозподіл коштів між членами родини ігнорується)')
         # TODO complete this part (what is there to complete, past me? I forgot)
 
 
 
 # returns amount of savings (converted to UAH) that each person accumulated (or lost) since previous declaration
 # should be deprecated
-def get_savings_diff_by_person_v1(prev_decl: Declaration, curr_decl: Declaration) -> dict[str, float]:
+def get_savings_diff_by_person_v1(context: 'AnalysisContext', prev_decl: Declaration, curr_decl: Declaration) -> dict[str, float]:
     diffs_by_person = {}
     # TODO: rewrite - calculate diff by currency for each person, and only then convert and get total
     if bool(prev_decl.savings_by_person) and bool(curr_decl.savings_by_person):
@@ -300,17 +453,17 @@ def get_savings_diff_by_person_v1(prev_decl: Declaration, curr_decl: Declaration
             diffs_by_person[person_] = curr_decl.savings_by_person[person_]
     if bool(prev_decl.savings_by_person):
         for person_ in prev_decl.savings_by_person.keys() - curr_decl.savings_by_person.keys():
-            log.info((f'There are no more savings that belong to {curr_decl.persons[person_].full_name}'
-                      f' in declaration ({curr_decl.written_type}, {curr_decl.year})'))
-            report.add_record(ReportLevel.SUBSTEP, f'There are no more savings that belong to a person with ID {person_}', critical=2)
+            log.info('There are no more savings that belong to %s in declaration (%s, %s)',
+                     curr_decl.persons[person_].full_name, curr_decl.written_type, curr_decl.year)
+            context.report.add_record(ReportLevel.SUBSTEP, f'There are no more savings that belong to a person with ID {person_}', critical=2)
     elif bool(curr_decl.savings_by_person):
         diffs_by_person = curr_decl.savings_by_person.copy()
     # elif bool(curr_decl.savings_by_person):
-    log.debug(f'get_savings_diff_by_person_v1() executed, result: {diffs_by_person}')
+    log.debug('get_savings_diff_by_person_v1() executed, result: %s', diffs_by_person)
     return diffs_by_person
 
 
-def get_savings_diff_by_person_v2(prev_decl: Declaration, curr_decl: Declaration) -> dict[str, dict[str, str|int|float]]:
+def get_savings_diff_by_person_v2(context: 'AnalysisContext', prev_decl: Declaration, curr_decl: Declaration) -> dict[str, dict[str, str|int|float]]:
     diffs_by_person: dict[str, dict[str, str|int|float]] = defaultdict(dict) # just create emtpy dictionary
     if bool(prev_decl.savings_by_prsn_and_curr) and bool(curr_decl.savings_by_prsn_and_curr):
         for person_ in (prev_decl.savings_by_prsn_and_curr.keys() & curr_decl.savings_by_prsn_and_curr.keys()):
@@ -326,21 +479,22 @@ def get_savings_diff_by_person_v2(prev_decl: Declaration, curr_decl: Declaration
             diffs_by_person[person_] = curr_decl.savings_by_prsn_and_curr[person_]
         # for every person that had savings declared in previous declaration, but does not have now
         for person_ in prev_decl.savings_by_prsn_and_curr.keys() - curr_decl.savings_by_prsn_and_curr.keys():
-            log.debug(f'no more person savings. previous list: {prev_decl.savings_by_prsn_and_curr.keys()}')
-            log.debug(f'no more person savings. current list: {curr_decl.savings_by_prsn_and_curr.keys()}')
-            log.debug(f'no more person savings. person id: {person_}')
-            log.info((f'There are no more savings that belong to a person with ID {person_}'
-                      f' in declaration ({curr_decl.written_type}, {curr_decl.year})'))
-            report.add_record(ReportLevel.SUBSTEP, f'There are no more savings that belong to {curr_decl.persons[person_].full_name} ({curr_decl.persons[person_].relation_type})', critical=2)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug('no more person savings. previous list: %s', prev_decl.savings_by_prsn_and_curr.keys())
+                log.debug('no more person savings. current list: %s', curr_decl.savings_by_prsn_and_curr.keys())
+                log.debug('no more person savings. person id: %s', person_)
+            log.info('There are no more savings that belong to a person with ID %s in declaration (%s, %s)',
+                     person_, curr_decl.written_type, curr_decl.year)
+            context.report.add_record(ReportLevel.SUBSTEP, f'There are no more savings that belong to {curr_decl.persons[person_].full_name} ({curr_decl.persons[person_].relation_type})', critical=2)
     # if current declaration has no savings, then report every person as the one whose savings are not declared now
     elif bool(prev_decl.savings_by_prsn_and_curr):
         for person_ in prev_decl.savings_by_prsn_and_curr.keys():
-            log.info((f'There are no more savings that belong to a person with ID {person_}'
-                      f' in declaration ({curr_decl.written_type}, {curr_decl.year})'))
-            report.add_record(ReportLevel.SUBSTEP, f'There are no more savings that belong to {curr_decl.persons[person_].full_name} ({curr_decl.persons[person_].relation_type})', critical=2)
+            log.info('There are no more savings that belong to a person with ID %s in declaration (%s, %s)',
+                     person_, curr_decl.written_type, curr_decl.year)
+            context.report.add_record(ReportLevel.SUBSTEP, f'There are no more savings that belong to {curr_decl.persons[person_].full_name} ({curr_decl.persons[person_].relation_type})', critical=2)
     elif bool(curr_decl.savings_by_prsn_and_curr):
         diffs_by_person = curr_decl.savings_by_prsn_and_curr.copy()
-    log.debug(f'get_savings_diff_by_person_v2() executed, result: {diffs_by_person}')
+    log.debug('get_savings_diff_by_person_v2() executed, result: %s', diffs_by_person)
     return diffs_by_person
 
 
@@ -358,9 +512,9 @@ def get_total_savings_diff_v1(prev_decl: Declaration, curr_decl: Declaration):
         continue # replace with reports and warnings
     # TODO add report output
     if diff is None:
-        log.warning(f'Something wrong in get_overall_savings_diff() - final difference is None.  '
-                    f'\n Previous declaration: {prev_decl}; \n Current declaration: {curr_decl}')
-    log.debug(f'get_overall_savings_diff() called, result:  {diff}')
+        log.warning('Something wrong in get_overall_savings_diff() - final difference is None.  '
+                    '\n Previous declaration: %s; \n Current declaration: %s', prev_decl, curr_decl)
+    log.debug('get_overall_savings_diff() called, result:  %s', diff)
     return diff
 
 
@@ -370,9 +524,9 @@ def get_savings_percentage_by_person(earnings_by_person: dict[str, float], savin
     ratios = {}
     for person_ in savings_diff_by_person.keys():
         if person_ not in earnings_by_person.keys():
-            log.warning(f'There are accumulated savings, but no earnings for a person with ID {person_}')
+            log.warning('There are accumulated savings, but no earnings for a person with ID %s', person_)
         ratios[person_] = savings_diff_by_person[person_] / earnings_by_person[person_]
-    log.debug(f'get_savings_percentage_by_person called, result: {ratios}')
+    log.debug('get_savings_percentage_by_person called, result: %s', ratios)
     return ratios
 
 
@@ -381,7 +535,7 @@ def get_savings_percentage_by_person(earnings_by_person: dict[str, float], savin
 def get_total_savings_to_earnings_ratio_v1(prev_decl: Declaration, curr_decl: Declaration):
     total_savings = get_total_savings_diff_v1(prev_decl, curr_decl)
     total_earnings = sum(curr_decl.earnings_by_person.values())
-    log.info(f'Total percentage of earnings: {(total_earnings / total_savings):.0%}')
+    log.info('Total percentage of earnings: %.0f%%', total_earnings / total_savings * 100)
     return total_savings / total_earnings
 
 # returns difference in savings (accumulated since last declaration) by currency
@@ -393,8 +547,8 @@ def get_savings_diff_by_avg(prev_decl: Declaration, curr_decl: Declaration) -> d
         savings_diff[curr] = - prev_decl.savings_by_currency[curr] # amount for removed currencies are saved as negative
     for curr in (prev_decl.savings_by_currency.keys() & curr_decl.savings_by_currency.keys()):
         savings_diff[curr] = curr_decl.savings_by_currency[curr] - prev_decl.savings_by_currency[curr]
-    log.debug(f'get_savings_diff_by_avg() executed for declaration [{curr_decl.declaration_id}] '
-              f'and previous one [{prev_decl.declaration_id}], result: {savings_diff}')
+    log.debug('get_savings_diff_by_avg() executed for declaration [%s] and previous one [%s], result: %s',
+              curr_decl.declaration_id, prev_decl.declaration_id, savings_diff)
     return savings_diff
 
 
@@ -414,68 +568,183 @@ def compare_savings_and_earnings(prev_decl: Declaration, curr_decl: Declaration)
 
 
 
+# value and owners of an asset declared again after a gap vs the last declaration before the gap
+# seen - index of that declaration in the timeline, index - of the declaration the asset is declared again in
+# returns '' if neither has changed
+def get_changes_since_gap(track: AssetTrack, seen: int, index: int, seen_year: int) -> str:
+    change: str = ''
+    old_value, value = track.value_at(seen), track.value_at(index)
+    if old_value != value:
+        change += (f'\n  - вартість у декларації за {seen_year} рік: {old_value or "не вказано"}, '
+                   f'зараз: {value or "не вказано"}.')
+    old_owners, owners = track.owners_at(seen), track.owners_at(index)
+    if old_owners != owners:
+        change += f'\n  - власники у декларації за {seen_year} рік: {old_owners}, зараз: {owners}.'
+    if change:
+        change = f'Змінені дані з {seen_year} року:' + change
+    return change
+
+
 # compares changes in declared property and reports differences
-def compare_property_list(prev_decl: Declaration, curr_decl: Declaration):
-    removed_ = [prop for prop in prev_decl.property_list if prop not in curr_decl.property_list]
-    added_ = [prop for prop in curr_decl.property_list if prop not in prev_decl.property_list]
-    for prop in removed_:
-        log.debug(f'Removed property: {prop}')
-        report.add_record(ReportLevel.SUBSTEP, f'Видалено нерухомість: ')
-        report.add_record(ReportLevel.DETAILS, f' {prop} ')
-    for prop in added_:
-        log.debug(f'Added property: {prop}')
-        report.add_record(ReportLevel.SUBSTEP, f'Додано нерухомість: ')
-        report.add_record(ReportLevel.DETAILS, f' {prop} ')
+# assets are matched by identity_key (see entities.assets.AssetDiff) - same records, in the same order,
+# as comparing every pair; with context.timeline property declared again after a gap is reported as such
+# (not as added), as declared in curr_decl, with changes of value and owners since it was last declared
+def compare_property_list(context: 'AnalysisContext', prev_decl: Declaration, curr_decl: Declaration):
+    timeline = context.timeline
+    if timeline is not None:
+        diff_ = timeline.diff('property', prev_decl, curr_decl)
+        reappeared = timeline.reappeared('property', prev_decl, curr_decl)
+    else:
+        diff_ = AssetDiff(prev_decl.property_list, curr_decl.property_list)
+        reappeared = []
+    reappeared_ids = {id(prop_) for _, prop_, _ in reappeared}
+    for prop in diff_.removed:
+        log.debug('Removed property: %s', prop)
+        context.report.add_record(ReportLevel.SUBSTEP, f'Видалено нерухомість: ')
+        context.report.add_record(ReportLevel.DETAILS, f' {prop} ')
+    for prop in diff_.added:
+        if id(prop) in reappeared_ids:
+            continue
+        log.debug('Added property: %s', prop)
+        context.report.add_record(ReportLevel.SUBSTEP, f'Додано нерухомість: ')
+        context.report.add_record(ReportLevel.DETAILS, f' {prop} ')
         # if str(curr_decl.year) in prop.acquire_date or :
-        #     report.add_record(ReportLevel.SUBSTEP, f'')
-    for prop in curr_decl.property_list:
-        for old_prop in prev_decl.property_list:
-            if prop == old_prop:
-                change_ = prop.get_changes_since(old_prop)
-                if change_:
-                    log.debug(f'Property change computed, concatenated outcome: {change_}')
-                    report.add_record(ReportLevel.SUBSTEP, change_)
+        #     context.report.add_record(ReportLevel.SUBSTEP, f'')
+    for track_, prop_, seen_ in reappeared:
+        seen_year = timeline.declarations[seen_].year
+        log.debug('Property declared again: %s, last declared in %s', prop_, seen_year)
+        context.report.add_record(ReportLevel.SUBSTEP, f'Знову задекларовано нерухомість, відсутню у попередній декларації '
+                                                       f'(востаннє - у декларації за {seen_year} рік): ',
+                                  critical=2)
+        context.report.add_record(ReportLevel.DETAILS, f' {prop_} ')
+        change_ = get_changes_since_gap(track_, seen_, timeline.index_of(curr_decl), seen_year)
+        if change_:
+            context.report.add_record(ReportLevel.DETAILS, change_)
+    for prop, old_props in zip(curr_decl.property_list, diff_.matches):
+        for old_prop in old_props:
+            change_ = prop.get_changes_since(old_prop)
+            if change_:
+                log.debug('Property change computed, concatenated outcome: %s', change_)
+                context.report.add_record(ReportLevel.SUBSTEP, change_)
         if prop.get_year_acquired() >= (curr_decl.year-2): # check recent purchases/acquisitions
             if not prop.cost:
-                log.debug(f'Property price not declared, but acquisition date is recent for property: {prop}')
-                report.add_record(ReportLevel.SUBSTEP, f'Власність набута нещодавно, проте вартість не вказана: ')
-                report.add_record(ReportLevel.DETAILS, f' {prop} ')
+                log.debug('Property price not declared, but acquisition date is recent for property: %s', prop)
+                context.report.add_record(ReportLevel.SUBSTEP, f'Власність набута нещодавно, проте вартість не вказана: ')
+                context.report.add_record(ReportLevel.DETAILS, f' {prop} ')
             elif not str(prop.cost).isdigit() and 'родич' in prop.cost.lower():
-                log.debug(f'Property price not declared by a relative, but acquisition date is recent for property: {prop}')
-                report.add_record(ReportLevel.SUBSTEP, f'Власність набута родичами нещодавно, проте родичі не надали інформацію про ціну: ')
-                report.add_record(ReportLevel.DETAILS, f' {prop} ')
-
-def compare_vehicle_list(prev_decl: Declaration, curr_decl: Declaration):
-    added_ = [vehicle for vehicle in curr_decl.vehicle_list if vehicle not in prev_decl.vehicle_list]
-    removed_ = [vehicle for vehicle in prev_decl.vehicle_list if vehicle not in curr_decl.vehicle_list]
-    for vehicle in removed_:
-        log.debug(f'Removed vehicle: {vehicle}')
-        report.add_record(ReportLevel.SUBSTEP, f'Видалено нерухоме майно (транспортний засіб): ')
-        report.add_record(ReportLevel.DETAILS, f' {vehicle} ')
-    for vehicle in added_:
-        log.debug(f'Added vehicle: {vehicle}')
-        report.add_record(ReportLevel.SUBSTEP, f'Додано нерухоме майно (транспортний засіб): ')
-        report.add_record(ReportLevel.DETAILS, f' {vehicle} ')
-    for vehicle in curr_decl.vehicle_list:
-        for old_vehicle in prev_decl.vehicle_list:
-            if vehicle == old_vehicle:
-                change_ = vehicle.get_changes_since(old_vehicle)
-                if change_:
-                    log.debug(f'Changes in vehicle list computed, concatenated outcome: {change_}')
-                    report.add_record(ReportLevel.SUBSTEP, change_)
+                log.debug('Property price not declared by a relative, but acquisition date is recent for property: %s', prop)
+                context.report.add_record(ReportLevel.SUBSTEP, f'Власність набута родичами нещодавно, проте родичі не надали інформацію про ціну: ')
+                context.report.add_record(ReportLevel.DETAILS, f' {prop} ')
+
+def compare_vehicle_list(context: 'AnalysisContext', prev_decl: Declaration, curr_decl: Declaration):
+    timeline = context.timeline
+    if timeline is not None:
+        diff_ = timeline.diff('vehicle', prev_decl, curr_decl)
+        reappeared = timeline.reappeared('vehicle', prev_decl, curr_decl)
+    else:
+        diff_ = AssetDiff(prev_decl.vehicle_list, curr_decl.vehicle_list)
+        reappeared = []
+    reappeared_ids = {id(vehicle_) for _, vehicle_, _ in reappeared}
+    for vehicle in diff_.removed:
+        log.debug('Removed vehicle: %s', vehicle)
+        context.report.add_record(ReportLevel.SUBSTEP, f'Видалено нерухоме майно (транспортний засіб): ')
+        context.report.add_record(ReportLevel.DETAILS, f' {vehicle} ')
+    for vehicle in diff_.added:
+        if id(vehicle) in reappeared_ids:
+            continue
+        log.debug('Added vehicle: %s', vehicle)
+        context.report.add_record(ReportLevel.SUBSTEP, f'Додано нерухоме майно (транспортний засіб): ')
+        context.report.add_record(ReportLevel.DETAILS, f' {vehicle} ')
+    for track_, vehicle_, seen_ in reappeared:
+        seen_year = timeline.declarations[seen_].year
+        log.debug('Vehicle declared again: %s, last declared in %s', vehicle_, seen_year)
+        context.report.add_record(ReportLevel.SUBSTEP, f'Знову задекларовано транспортний засіб, відсутній у попередній декларації '
+                                                       f'(востаннє - у декларації за {seen_year} рік): ',
+                                  critical=2)
+        context.report.add_record(ReportLevel.DETAILS, f' {vehicle_} ')
+        change_ = get_changes_since_gap(track_, seen_, timeline.index_of(curr_decl), seen_year)
+        if change_:
+            context.report.add_record(ReportLevel.DETAILS, change_)
+    for vehicle, old_vehicles in zip(curr_decl.vehicle_list, diff_.matches):
+        for old_vehicle in old_vehicles:
+            change_ = vehicle.get_changes_since(old_vehicle)
+            if change_:
+                log.debug('Changes in vehicle list computed, concatenated outcome: %s', change_)
+                context.report.add_record(ReportLevel.SUBSTEP, change_)
         if vehicle.get_acquire_year() >= (curr_decl.year - 2) and (not vehicle.cost or not str(vehicle.cost).isdecimal()):
-            log.debug(f'Vehicle price not declared, but acquisition date is recent for property: {vehicle}')
-            report.add_record(ReportLevel.SUBSTEP,
+            log.debug('Vehicle price not declared, but acquisition date is recent for property: %s', vehicle)
+            context.report.add_record(ReportLevel.SUBSTEP,
                         f'Рухоме майно (транспортний засіб) набуте нещодавно, проте вартість не вказана: {vehicle}')
-            report.add_record(ReportLevel.DETAILS, f' {vehicle} ')
+            context.report.add_record(ReportLevel.DETAILS, f' {vehicle} ')
 
 # ----------------------------
 
-def check_person(full_name, declarant_id = 0):
-    global report
-    report = reports.init_new_report()
-    declarations_json = get_all_declarations_by_name(full_name)
-    declarations_list = parse_declaration_cards(declarations_json)
+# --- class AnalysisContext ---
+# state of one check_person run: the report comparisons write to and what is computed for the whole
+# timeline of the declarant; every run has its own, so several declarants can be checked at the same time
+# timeline - property, vehicles and savings accounts of all declarations, each with a stable id, first and last
+#   appearance, value and owner history
+# savings_ranges - change of savings by min and max exchange rates and its ratio to income, for every declaration
+#   up to the first one with a missing exchange rate; None if ranges are not computed at all
+# declarations added for savings ranges wait until a range is requested, then all waiting ones are computed in one
+#   extend() (check_person asks for the range of each declaration right after adding it)
+@dataclass
+class AnalysisContext:
+    report: GeneralReport = field(default_factory=init_new_report)
+    timeline: AssetTimeline = field(default_factory=AssetTimeline)
+    savings_ranges: SavingsChangeRanges|None = field(default_factory=SavingsChangeRanges)
+    _pending: list[Declaration] = field(default_factory=list, repr=False)
+    # set when a rate was missing - later declarations get no range
+    _ranges_stopped: bool = field(default=False, repr=False)
+
+    # adds the next loaded declaration (in the order they are compared) to the timeline and savings ranges
+    def add_declaration(self, declaration: Declaration):
+        self.timeline.add(declaration)
+        if self.savings_ranges is not None and not self._ranges_stopped:
+            self._pending.append(declaration)
+
+    # None if the range was not computed (e.g. an exchange rate is missing)
+    def get_savings_range(self, declaration: Declaration) -> SavingsChangeRange|None:
+        self._update_savings_ranges()
+        if self.savings_ranges is None or declaration not in self.savings_ranges:
+            return None
+        return self.savings_ranges.get(declaration)
+
+    # computes ranges of all pending declarations at once; if a rate is missing, declarations before the one
+    # that needs it keep their ranges (extend() adds nothing when it fails), as if they were added one by one
+    def _update_savings_ranges(self):
+        pending, self._pending = self._pending, []
+        if self.savings_ranges is None or not pending:
+            return
+        try:
+            self.savings_ranges.extend(pending)
+        except ValueError:
+            for i_, declaration_ in enumerate(pending):
+                try:
+                    self.savings_ranges.extend([declaration_])
+                except ValueError:
+                    log.error('Could not compute savings change range for declaration %s, '
+                              'ranges are not reported from here on', declaration_.declaration_id)
+                    self._ranges_stopped = True
+                    pending = pending[:i_]
+                    break
+        for declaration_ in pending:
+            if self.savings_ranges.get(declaration_).exceeds_income():
+                log.info('Savings change exceeds income by any exchange rate in declaration [%s], year: %s',
+                         declaration_.declaration_id, declaration_.year)
+    # --- class AnalysisContext end ---
+
+
+def check_person(full_name, declarant_id = 0, workers: int = None):
+    return analyze_person(full_name, declarant_id, workers).report
+
+
+# does what check_person does, returns the whole context - report, asset timeline (i.e. loaded declarations)
+# and savings change ranges
+def analyze_person(full_name, declarant_id = 0, workers: int = None) -> AnalysisContext:
+    context = AnalysisContext()
+    report = context.report
+    declarations_list = list(iter_declaration_cards(full_name))
 
     # fail if there are namesakes - need to run again with declarant_id specified TODO rewrite this part
     if not check_for_namesakes(declarations_list):
@@ -496,26 +765,61 @@ def check_person(full_name, declarant_id = 0):
     elif len(major_declarations) == 0:
         report.add_top_info(full_name, (0, 0))
         report.add_record(ReportLevel.TOP, 'Декларацій не знайдено', critical=3)
-        return report
+        return context
     else:
         year_range = (major_declarations[0].year, major_declarations[0].year)
     report.add_top_info(full_name, year_range)
 
-    for decl in major_declarations:
-        load_full_declaration(decl)
-
-    run_comparison(major_declarations[0], major_declarations[0]) #to report very first declaration
-    for i_ in range(1, len(major_declarations)):
-        # print(major_declarations[i_])
-        run_comparison(major_declarations[i_-1], major_declarations[i_])
+    # each declaration is compared as soon as it and the ones before it are loaded, while the next ones are loading
+    # a declaration that failed to load is reported where it would have been compared
+    prev_decl = None
+    for decl_, is_loaded_ in iter_full_declarations(major_declarations, workers):
+        if not is_loaded_:
+            report.add_record(ReportLevel.TOP, f'Не вдалося завантажити декларацію {decl_.written_type} за {decl_.year} рік.',
+                              critical=2, hyperlink=f'{REGULAR_DECL_VIEW_ADDRESS+decl_.declaration_id}')
+            continue
+        context.add_declaration(decl_)
+        run_comparison(context, prev_decl or decl_, decl_) # very first declaration is compared with itself
+        prev_decl = decl_
         # report.add_empty_line()
+    log.debug('%s: %d assets in %d declarations', full_name, len(context.timeline.tracks), len(context.timeline))
     # print(report)
-    return report
+    return context
+
+
+# checks several persons one after another, yields (full name, report) in the same order; while a report is
+# being finished, the next `prefetch` persons (settings.PERSON_PREFETCH) are already fetched and analysed
+# in the background, so the network waits for one person overlap with the analysis of another
+# a person that could not be checked is yielded with the exception instead of the report
+def check_persons(full_names: Iterable[str], workers: int = None,
+                  prefetch: int = None) -> Iterator[tuple[str, GeneralReport|Exception]]:
+    prefetch = settings.PERSON_PREFETCH if prefetch is None else prefetch
+    full_names = iter(full_names)
+    with ThreadPoolExecutor(max_workers=prefetch + 1) as executor:
+        pending: deque = deque()
+
+        def submit_next():
+            name_ = next(full_names, None)
+            if name_ is not None:
+                pending.append((name_, executor.submit(check_person, name_, workers=workers)))
+
+        for _ in range(prefetch + 1):
+            submit_next()
+        while pending:
+            name_, future_ = pending.popleft()
+            try:
+                result = future_.result()
+            except Exception as err:
+                log.error('Could not check declarations of %s', name_)
+                result = err
+            submit_next()
+            yield name_, result
 
 
 # -------------------------
 
 def run_for_one():
+    configure_logging()
     name = 'НЕБИЛИЦЯ Ольга Дмитрівна'
     person_report = check_person(name)
     # print(person_report)
@@ -523,6 +827,7 @@ def run_for_one():
 
 
 def run_namelist():
+    configure_logging()
     name_list = [
         'МОРДАЧ Віктор Олексійович',
         'АГУТІН Михайло Миколайович',
@@ -539,9 +844,10 @@ def run_namelist():
         'МИХАНЧУК Валентина Володимирівна'
     ]
     err_list = []
-    for name_ in name_list:
+    for name_, rep in check_persons(name_list):
         try:
-            rep = check_person(name_)
+            if isinstance(rep, Exception):
+                raise rep
             print(f'{name_} checked')
             rep.print_to_docx()
             print(f'{name_} report printed to docx')
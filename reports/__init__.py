@@ -1 +1,6 @@
-from reports.general_report import ReportLevel, init_new_report
\ No newline at end of file
+import logging
+
+from reports.general_report import ReportLevel, init_new_report
+
+# records of the package go nowhere unless the application configures logging (logconfig.configure_logging)
+logging.getLogger(__name__).addHandler(logging.NullHandler())
@@ -1,11 +1,13 @@
+import copy
 import os
+import threading
 from dataclasses import dataclass
 from enum import Enum
-from docx import *
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.opc.constants import RELATIONSHIP_TYPE
-from docx.oxml import OxmlElement, shared
-from docx.shared import RGBColor
+
+import settings
+
+# python-docx is imported by the functions that write documents - reports are built and printed as text
+# without it, and importing it takes longer than everything else here
 
 
 class ReportLevel(Enum):
@@ -51,7 +53,9 @@ class GeneralReport(object):
 
 
     def print_to_docx(self):
-        doc = Document('template.docx')
+        from docx.enum.text import WD_ALIGN_PARAGRAPH
+        from docx.shared import RGBColor
+        doc = new_report_document()
         # style = doc.styles['Normal']
         # font = style.font
         # font.name = 'Arial'
@@ -123,7 +127,32 @@ def init_new_report():
     return GeneralReport()
 
 
+_templates: dict = {} # path -> docx.document.Document
+_template_lock = threading.Lock()
+
+
+# report template (settings.REPORT_TEMPLATE), read and parsed once per process - never modified, only copied
+def get_template_document(path: str = None):
+    from docx import Document
+    path = path or settings.REPORT_TEMPLATE
+    template = _templates.get(path)
+    if template is None:
+        with _template_lock:
+            template = _templates.get(path)
+            if template is None:
+                template = _templates[path] = Document(path)
+    return template
+
+
+# new report document - a deep copy of the parsed template: no file access or xml parsing per report,
+# and the same content as opening the template file
+def new_report_document():
+    return copy.deepcopy(get_template_document())
+
+
 def add_hyperlink_into_run(paragraph, run, url):
+    from docx.opc.constants import RELATIONSHIP_TYPE
+    from docx.oxml import OxmlElement, shared
     runs = paragraph.runs
     for i in range(len(runs)):
         if runs[i].text == run.text:
@@ -0,0 +1,103 @@
+# Runtime settings shared by nazkTools and the modules it uses.
+# Values here are module-level defaults - override them before the first call, e.g.:
+#   import settings
+#   settings.LOAD_WORKERS = 8
+import os
+
+# NAZK public API root; point it at a local stand-in (python -m api.standin) to run without network
+API_BASE_URL = os.environ.get('NAZK_API_BASE_URL', 'https://public-api.nazk.gov.ua')
+# if set, every successful list/document response is saved to this directory as a replay fixture (api.replay)
+# disable caches (CACHE_ENABLED) while recording - responses served from cache are not recorded
+RECORD_FIXTURES_DIR = os.environ.get('NAZK_RECORD_DIR')
+
+# level of messages printed by command line entry points (logconfig.configure_logging):
+# 'DEBUG', 'INFO', 'WARNING' or 'ERROR'
+LOG_LEVEL = os.environ.get('NAZK_LOG_LEVEL', 'ERROR')
+
+# number of full declarations fetched and parsed in parallel for one declarant
+LOAD_WORKERS = 4
+
+# how many full declarations of one declarant may be loading or loaded but not yet compared (check_person
+# compares each one as soon as it and all earlier ones are loaded)
+LOAD_WINDOW = 8
+
+# how many of the next persons check_persons() fetches and analyses while the current one is finished
+PERSON_PREFETCH = 1
+
+# docx file every report starts from (parsed once per process, see reports.general_report.get_template_document)
+REPORT_TEMPLATE = 'template.docx'
+
+# --- Batch runs (batch.py) ---
+# number of worker processes, each with its own HTTP client and cache handles
+BATCH_WORKERS = 4
+# how many times a name is tried in one run before it is left for the next run
+BATCH_ATTEMPTS = 3
+# delay before the next attempt of a failed name: BACKOFF, 2*BACKOFF, 4*BACKOFF... seconds
+BATCH_RETRY_BACKOFF = 30
+# the run stops if the worker pool breaks this many times in a row before any name reaches a worker
+# (workers crash on start - e.g. broken settings or environment)
+BATCH_MAX_POOL_FAILURES = 3
+# append-only journal of finished attempts (one json object per line); a restarted run skips names done in it
+BATCH_JOURNAL = 'batch_journal.jsonl'
+# names a worker process checks before it is replaced by a new one; None - workers live for the whole run
+# (modules, report template and parser version are loaded once per worker, see batch.warm_up_worker)
+BATCH_TASKS_PER_WORKER = None
+# how often throughput is printed while a batch is running, seconds
+BATCH_PROGRESS_INTERVAL = 30
+
+# safety limit for pagination over documents/list results
+SEARCH_MAX_PAGES = 100
+
+# --- HTTP client (api.client.NazkClient) ---
+# max number of keep-alive connections kept open to the NAZK API
+HTTP_POOL_SIZE = 10
+# (connect, read) timeouts in seconds
+HTTP_TIMEOUT = (5, 30)
+# how many times a request is repeated after a connection error, 429 or 5xx response
+HTTP_RETRIES = 3
+# base delay in seconds for exponential backoff between retries: BACKOFF, 2*BACKOFF, 4*BACKOFF...
+HTTP_BACKOFF = 0.5
+# upper limit for a single backoff delay (also caps Retry-After sent by the server)
+HTTP_BACKOFF_MAX = 30
+
+# --- Adaptive request limiter (api.ratelimit.AdaptiveLimiter) ---
+# number of concurrent requests allowed at start; grows by ~1 per round of successful requests
+RATE_LIMIT_INITIAL = 4
+RATE_LIMIT_MIN = 1
+# no point going above the connection pool size - extra requests would wait for a connection anyway
+RATE_LIMIT_MAX = HTTP_POOL_SIZE
+# limit is multiplied by this after a 429 (or a too slow response)
+RATE_LIMIT_DECREASE = 0.5
+# response slower than RATE_LATENCY_FACTOR * typical latency counts as overload
+RATE_LATENCY_FACTOR = 4.0
+
+# JSON decoder for API responses: 'auto' (orjson if installed), 'orjson' or 'json' (stdlib) - see api.jsondecode
+JSON_BACKEND = 'auto'
+# parse full declarations with a streaming parser (needs ijson): only the steps being parsed are built
+# as python objects, one at a time, and cached documents are read straight from disk - much lower peak memory
+# for large documents; with False (or without ijson) the whole document is decoded with JSON_BACKEND
+STREAMING_PARSE = False
+
+# what a loaded Declaration does with its raw document once the requested steps are parsed:
+# 'keep', 'drop' or 'compressed' (zlib) - see entities.declaration.RAW_RETENTION_POLICIES
+# dropped documents are loaded again from the document cache if a step is parsed later
+RAW_RETENTION = 'keep'
+# the same for declarations loaded in bulk (load_full_declarations, used by check_person) - after analysis steps
+# are parsed nothing reads the raw documents, and reports keep declarations alive until the run ends
+BATCH_RAW_RETENTION = 'drop'
+
+# official daily exchange rates, csv or parquet (entities.rates.ExchangeRates) - date, currency, rate[, units]
+# without it only UAH, USD and EUR can be converted, by the hand-maintained yearly tables
+EXCHANGE_RATES_FILE = os.environ.get('NAZK_EXCHANGE_RATES')
+
+# --- On-disk caches (api.cache) ---
+CACHE_ENABLED = True
+# root directory for all caches, relative to the working directory
+CACHE_DIR = '.nazk_cache'
+# raw declaration documents - they never change once published, evicted only by size
+DOCUMENT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# search results - new declarations may appear, so entries expire after SEARCH_CACHE_TTL seconds
+SEARCH_CACHE_MAX_BYTES = 100 * 1024 ** 2
+SEARCH_CACHE_TTL = 60 * 60
+# parsed Declaration objects - entries of outdated parser versions are never read again and get evicted first
+PARSED_CACHE_MAX_BYTES = 512 * 1024 ** 2
@@ -0,0 +1,164 @@
+# Batch runs against the local API stand-in (api.standin) with synthetic declarants - no network needed.
+# run from repository root: python -m pytest tests
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import batch
+import settings
+from api import FixtureStore, NazkStandIn
+from benchmarks import synthetic
+
+POISON_NAME = 'ОТРУТА Вбиває Воркера'
+
+
+# ------ Functions run in worker processes ------
+# workers are spawned - they import these from this module, patches made in the test process do not reach them
+
+# fails every name; the time of the attempt goes to the journal with the error
+def check_name_failing(task: batch.BatchTask, write_docx: bool = True) -> tuple[str, int, float, str|None]:
+    return batch.STATUS_FAILED, 0, 0.0, f'failed at {time.time()}'
+
+
+# the worker process dies while it checks POISON_NAME; other names are checked as usual
+def check_name_or_die(task: batch.BatchTask, write_docx: bool = True) -> tuple[str, int, float, str|None]:
+    if task.full_name != POISON_NAME:
+        return batch.check_name(task, write_docx)
+    with mock.patch('nazkTools.analyze_person', side_effect=lambda *args_: os._exit(1)):
+        return batch.check_name(task, write_docx)
+
+
+def init_worker_failing(*args):
+    raise RuntimeError('worker does not start')
+
+
+# ------ Tests ------
+
+class StandInTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory(prefix='nazk-test-batch-')
+        self.root = self._tmp.name
+        self.journal_path = os.path.join(self.root, 'journal.jsonl')
+        store = FixtureStore(os.path.join(self.root, 'fixtures'))
+        self.tasks = [batch.BatchTask(name_) for name_ in synthetic.write_fixtures(store, 3, years=(2020, 2022))]
+        self.stand_in = NazkStandIn(store, latency=0.0)
+        self.stand_in.__enter__()
+        # workers get these with the rest of settings
+        self._saved = {name_: getattr(settings, name_)
+                       for name_ in ('API_BASE_URL', 'CACHE_ENABLED', 'REPORT_TEMPLATE', 'BATCH_PROGRESS_INTERVAL')}
+        settings.API_BASE_URL = self.stand_in.base_url
+        settings.CACHE_ENABLED = False
+        settings.REPORT_TEMPLATE = os.path.join(self.root, 'missing-template.docx')
+        settings.BATCH_PROGRESS_INTERVAL = 1
+
+    def tearDown(self):
+        for name_, value_ in self._saved.items():
+            setattr(settings, name_, value_)
+        self.stand_in.__exit__(None, None, None)
+        self._tmp.cleanup()
+
+    def _run(self, tasks: list[batch.BatchTask] = None, attempts: int = 1, backoff: float = 0,
+             write_docx: bool = False) -> tuple[list[batch.BatchTask], list[dict]]:
+        not_done = batch.run_batch(self.tasks if tasks is None else tasks, self.journal_path, workers=2,
+                                   attempts=attempts, backoff=backoff, write_docx=write_docx)
+        return not_done, self._read_journal()
+
+    def _read_journal(self) -> list[dict]:
+        with open(self.journal_path, encoding='utf-8') as f:
+            return [json.loads(line_) for line_ in f]
+
+
+class RunBatchWithoutTemplateTest(StandInTestCase):
+
+    # the template is not needed at all
+    def test_no_docx(self):
+        not_done, entries = self._run(write_docx=False)
+        self.assertEqual(not_done, [])
+        self.assertEqual(sorted(entry_['key'] for entry_ in entries), sorted(task_.key for task_ in self.tasks))
+        self.assertTrue(all(entry_['status'] == batch.STATUS_DONE for entry_ in entries))
+
+    # workers still start; every name fails on its own report, the pool is never broken
+    def test_docx(self):
+        not_done, entries = self._run(write_docx=True)
+        self.assertEqual(sorted(task_.key for task_ in not_done), sorted(task_.key for task_ in self.tasks))
+        self.assertEqual(len(entries), len(self.tasks))
+        for entry_ in entries:
+            self.assertEqual(entry_['status'], batch.STATUS_FAILED)
+            self.assertNotIn('BrokenProcessPool', entry_['error'])
+
+
+class JournalResumeTest(StandInTestCase):
+
+    # a name done in the journal is skipped; a failed one is checked again, its attempts continue the journal's
+    def test_resume(self):
+        done, failed, new = self.tasks
+        journal = batch.BatchJournal(self.journal_path)
+        journal.record(done, batch.STATUS_DONE, 1)
+        journal.record(failed, batch.STATUS_FAILED, 2, error='ConnectionError: earlier run')
+        journal.close()
+
+        not_done, entries = self._run()
+        self.assertEqual(not_done, [])
+        resumed = {entry_['key']: entry_ for entry_ in entries[2:]}
+        self.assertEqual(sorted(resumed), sorted([failed.key, new.key]))
+        self.assertEqual((resumed[failed.key]['status'], resumed[failed.key]['attempt']), (batch.STATUS_DONE, 3))
+        self.assertEqual((resumed[new.key]['status'], resumed[new.key]['attempt']), (batch.STATUS_DONE, 1))
+
+        # everything is done now - nothing is checked at all
+        not_done, entries_again = self._run()
+        self.assertEqual(not_done, [])
+        self.assertEqual(entries_again, entries)
+
+
+class RetryTest(StandInTestCase):
+
+    # a failing name is tried `attempts` times, each retry after backoff * 2 ** (attempt - 1) seconds
+    def test_attempts_and_backoff(self):
+        task = self.tasks[0]
+        with mock.patch('batch.check_name', check_name_failing):
+            not_done, entries = self._run([task], attempts=3, backoff=0.3)
+        self.assertEqual(not_done, [task])
+        self.assertEqual([(entry_['status'], entry_['attempt']) for entry_ in entries],
+                         [(batch.STATUS_FAILED, 1), (batch.STATUS_FAILED, 2), (batch.STATUS_FAILED, 3)])
+        tried_at = [float(entry_['error'].split()[-1]) for entry_ in entries]
+        self.assertGreaterEqual(tried_at[1] - tried_at[0], 0.3)
+        self.assertGreaterEqual(tried_at[2] - tried_at[1], 0.6)
+
+        # attempts of the next run continue the journal, the delay starts over
+        with mock.patch('batch.check_name', check_name_failing):
+            self._run([task], attempts=1, backoff=0.3)
+        self.assertEqual(self._read_journal()[-1]['attempt'], 4)
+
+
+class BrokenPoolTest(StandInTestCase):
+
+    # a worker dies on one name: only that name is charged attempts, every other one is done on its first
+    def test_only_the_crashing_name_is_charged(self):
+        poison = batch.BatchTask(POISON_NAME)
+        tasks = [self.tasks[0], poison, *self.tasks[1:]]
+        with mock.patch('batch.check_name', check_name_or_die):
+            not_done, entries = self._run(tasks, attempts=2)
+        self.assertEqual(not_done, [poison])
+        by_key = {}
+        for entry_ in entries:
+            by_key.setdefault(entry_['key'], []).append(entry_)
+        self.assertEqual([(entry_['status'], entry_['attempt']) for entry_ in by_key.pop(poison.key)],
+                         [(batch.STATUS_FAILED, 1), (batch.STATUS_FAILED, 2)])
+        self.assertEqual(sorted(by_key), sorted(task_.key for task_ in self.tasks))
+        for entries_ in by_key.values():
+            self.assertEqual([(entry_['status'], entry_['attempt']) for entry_ in entries_], [(batch.STATUS_DONE, 1)])
+
+    # workers that cannot start break every pool before any name reaches them - the run stops, nobody is charged
+    def test_workers_fail_to_start(self):
+        with mock.patch('batch.init_worker', init_worker_failing):
+            with self.assertRaises(RuntimeError):
+                self._run()
+        self.assertEqual(self._read_journal(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# Asset comparisons with the timeline of all declarations built up front, as check_person builds it.
+# run from repository root: python -m pytest tests
+import unittest
+
+import nazkTools
+from entities.declaration import Declaration
+from entities.property import Property
+from entities.timeline import AssetTimeline
+from entities.vehicle import Vehicle
+
+
+def _declaration(year: int, property_list: list = (), vehicle_list: list = ()) -> Declaration:
+    declaration = Declaration(1, f'decl-{year}', 1, f'{year + 1}-03-01', year, 1)
+    declaration.property_list = list(property_list)
+    declaration.vehicle_list = list(vehicle_list)
+    return declaration
+
+
+def _flat(cost: int, owners: dict) -> Property:
+    return Property('Київ', 'Квартира', '01.02.2010', 54.3, 'Власність', owners, cost)
+
+
+def _car(cost: int, owners: dict) -> Vehicle:
+    return Vehicle('Легковий автомобіль', 'Skoda', 'Octavia', '2012', '15.06.2014', owners, cost)
+
+
+# the asset is declared in 2017, missing in 2018, declared again in 2019 and changed in 2020
+class ReappearedAssetTest(unittest.TestCase):
+
+    def _compare(self, kind: str, assets: dict[int, list]) -> str:
+        timeline = AssetTimeline((kind,))
+        declarations = {year_: _declaration(year_, **{f'{kind}_list': assets_}) for year_, assets_ in assets.items()}
+        for declaration_ in declarations.values():
+            timeline.add(declaration_)
+        context = nazkTools.AnalysisContext(timeline=timeline)
+        compare = nazkTools.compare_property_list if kind == 'property' else nazkTools.compare_vehicle_list
+        compare(context, declarations[2018], declarations[2019])
+        return '\n'.join(entry_.text for entry_ in context.report.entry_list)
+
+    def test_property(self):
+        report = self._compare('property', {2017: [_flat(100, {'1': '100'})], 2018: [],
+                                            2019: [_flat(150, {'1': '100'})],
+                                            2020: [_flat(200, {'1': '50', '2': '50'})]})
+        self.assertIn('Знову задекларовано нерухомість', report)
+        self.assertIn('(востаннє - у декларації за 2017 рік)', report)
+        self.assertIn(str(_flat(150, {'1': '100'})), report) # as declared in 2019
+        self.assertNotIn('200 грн', report)
+        self.assertNotIn('Додано нерухомість', report)
+        self.assertIn('вартість у декларації за 2017 рік: 100, зараз: 150', report)
+        self.assertNotIn('власники у декларації', report)
+
+    def test_vehicle(self):
+        report = self._compare('vehicle', {2017: [_car(300000, {'1': '100'})], 2018: [],
+                                           2019: [_car(300000, {'2': '100'})],
+                                           2020: [_car(250000, {'2': '100'})]})
+        self.assertIn('Знову задекларовано транспортний засіб', report)
+        self.assertIn(str(_car(300000, {'2': '100'})), report)
+        self.assertNotIn('250000 грн', report)
+        self.assertNotIn('Додано нерухоме майно', report)
+        self.assertNotIn('вартість у декларації', report)
+        self.assertIn("власники у декларації за 2017 рік: {'1': '100'}, зараз: {'2': '100'}", report)
+
+
+if __name__ == '__main__':
+    unittest.main()